@@ -0,0 +1,46 @@
+import polars as pl
+import pycountry
+
+#------------------------------------------------------------------------------#
+#     Build the country reference table shared by the weekly scripts           #
+#------------------------------------------------------------------------------#
+# Scripts read countries.parquet with pl.scan_parquet instead of importing and
+# iterating pycountry on every run. Run this script again only to refresh the
+# table after a pycountry upgrade.
+#
+# Columns: NAME, ALPHA_2, ALPHA_3, NUMERIC, ALIASES. ALIASES lists the common
+# and official names that differ from NAME, for example 'United States of
+# America', which is how the Stack Overflow survey spells the USA.
+
+df_countries = (
+    pl.DataFrame(
+        [
+            {
+                'NAME': c.name,
+                'ALPHA_2': c.alpha_2,
+                'ALPHA_3': c.alpha_3,
+                'NUMERIC': int(c.numeric),
+                'ALIASES': [
+                    alias for alias in (
+                        getattr(c, 'common_name', None),
+                        getattr(c, 'official_name', None),
+                    )
+                    if alias is not None and alias != c.name
+                ],
+            }
+            for c in pycountry.countries
+        ],
+        schema={
+            'NAME': pl.String,
+            'ALPHA_2': pl.String,
+            'ALPHA_3': pl.String,
+            'NUMERIC': pl.UInt16,
+            'ALIASES': pl.List(pl.String),
+        },
+    )
+    .sort('ALPHA_3')
+)
+
+if __name__ == '__main__':
+    df_countries.write_parquet('countries.parquet')
+    print(df_countries)
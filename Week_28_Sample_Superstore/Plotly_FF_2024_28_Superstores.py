@@ -1,6 +1,7 @@
 import polars as pl
 import plotly.express as px
 import plotly.graph_objects as go
+from superstore_cube import build_cube, cube_slice
 
 # enumeration list generated in exploratory mode with value counts
 
@@ -32,17 +33,30 @@ df = (
     )
 )
 
+#------------------------------------------------------------------------------#
+#     Aggregate every dimension combination once, slices come from memory      #
+#------------------------------------------------------------------------------#
+cube = build_cube(
+    df,
+    dims=['Category', 'Sub-Category', 'Region', 'Segment', 'Ship Mode',
+          'Country/Region', 'SHIP_YEAR', 'SHIP_MONTH'],
+)
+
+df_by_year_month_country = cube_slice(cube, ['SHIP_YEAR', 'SHIP_MONTH', 'Country/Region'])
+
 df_sales_by_year_month_country = (
-    df.group_by(['SHIP_YEAR', 'SHIP_MONTH', 'Country/Region']).agg(pl.col('Sales').sum())
+    df_by_year_month_country
     .pivot(index = ['SHIP_YEAR', 'SHIP_MONTH'],
-           on = 'Country/Region')
+           on = 'Country/Region',
+           values = 'Sales')
     .sort('SHIP_YEAR', 'SHIP_MONTH')
 )
 
 df = (
-    df.group_by(['SHIP_YEAR', 'SHIP_MONTH', 'Country/Region']).agg(pl.col('Profit').sum())
+    df_by_year_month_country
     .pivot(index = ['SHIP_YEAR', 'SHIP_MONTH'],
-           on = 'Country/Region')
+           on = 'Country/Region',
+           values = 'Profit')
     .sort('SHIP_YEAR', 'SHIP_MONTH')
     .with_columns(YEAR_MONTH = pl.col('SHIP_YEAR').cast(pl.String) + '_' + pl.col('SHIP_MONTH').cast(pl.String).str.zfill(2))
     .with_columns(dt_YEAR_MONTH = pl.col('SHIP_YEAR').cast(pl.String) + '_' + pl.col('SHIP_MONTH').cast(pl.String).str.zfill(2))
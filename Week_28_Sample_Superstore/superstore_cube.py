@@ -0,0 +1,84 @@
+import itertools
+import polars as pl
+
+#------------------------------------------------------------------------------#
+#     OLAP cube for the sample superstore                                      #
+#------------------------------------------------------------------------------#
+# The cube is a dictionary of rollups, one per combination of dimensions. The
+# key is a tuple of dimension names in the order given to build_cube, the value
+# is a dataframe with those dimensions and the summed measures. Every rollup is
+# aggregated once from the finest grain (the base cuboid), so the Excel data is
+# grouped only one time no matter how many slices a dashboard asks for.
+
+def build_cube(df, dims, measures=('Sales', 'Profit', 'Quantity')):
+    '''
+    Materialize every combination of dims with summed measures. Enum columns
+    are grouped on their physical codes and decoded back to Enum at the end,
+    so all groupings run over small integers instead of strings.
+    '''
+    dims, measures = list(dims), list(measures)
+    enum_dims = {d: df.schema[d] for d in dims if isinstance(df.schema[d], pl.Enum)}
+
+    base_cuboid = (
+        df.lazy()
+        .select(pl.col(dims), pl.col(measures))
+        .with_columns(pl.col(list(enum_dims)).to_physical())
+        .group_by(dims).agg(pl.col(measures).sum())
+        .collect()
+    )
+
+    keys = [
+        combo
+        for n in range(len(dims) + 1)
+        for combo in itertools.combinations(dims, n)
+    ]
+    rollups = pl.collect_all([
+        (
+            base_cuboid.lazy()
+            .group_by(list(key)).agg(pl.col(measures).sum())
+            .sort(list(key))
+            if key else
+            base_cuboid.lazy().select(pl.col(measures).sum())
+        )
+        for key in keys
+    ])
+
+    def decode(rollup):
+        return rollup.with_columns(
+            pl.col(d).replace_strict(
+                list(range(len(enum_dims[d].categories))),
+                enum_dims[d].categories.to_list(),
+                return_dtype=enum_dims[d],
+            )
+            for d in enum_dims if d in rollup.columns
+        )
+    return {key: decode(rollup) for key, rollup in zip(keys, rollups)}
+
+
+def cube_slice(cube, by, **filters):
+    '''
+    Answer a query from memory: group by the dims in list by, restricted to
+    filters given as dim=value or dim=[values]. Filter dims are looked up in
+    the rollup of by + filter dims, then summed away if they are not in by.
+    Pass filter dims with spaces or slashes in their names via a dict, e.g.
+    cube_slice(cube, ['Region'], **{'Ship Mode': 'Same Day'})
+    '''
+    all_dims = max(cube, key=len)
+    wanted = set(by) | set(filters)
+    unknown = wanted - set(all_dims)
+    if unknown:
+        raise KeyError(f'dimensions not in cube: {sorted(unknown)}')
+    key = tuple(d for d in all_dims if d in wanted)
+    measures = cube[()].columns   # grand total rollup holds only the measures
+
+    df = cube[key]
+    for dim, value in filters.items():
+        values = value if isinstance(value, (list, tuple, set)) else [value]
+        df = df.filter(pl.col(dim).is_in(list(values)))
+    if set(filters) - set(by):
+        df = (
+            df.group_by(list(by), maintain_order=True).agg(pl.col(measures).sum())
+            if by else
+            df.select(pl.col(measures).sum())
+        )
+    return df
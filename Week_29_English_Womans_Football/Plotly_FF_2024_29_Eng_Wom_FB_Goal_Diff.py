@@ -3,6 +3,7 @@ import plotly
 import polars.selectors as cs
 import plotly.express as px
 import plotly.graph_objects as go
+from ewf_standings import matchday_standings
 
 def tweak_df_appearances():
     return(
@@ -75,76 +76,53 @@ df_table = (
 )
 print(df_table)
 
-seasons =  df_appearances['SEASON'].unique().to_list()
-
-df_pivot = (
-    df_appearances
-    .with_columns(
-        SEASON_GOAL_DIFF = pl.cum_sum('goal_difference').over('SEASON', 'team_name')
-    )
-    .pivot(
-        on = 'team_name',
-        index=['SEASON', 'MATCH_NUM'],
-        values = 'SEASON_GOAL_DIFF'
-    )
-)
-for season in df_pivot['SEASON'].unique().to_list():
-    print(season)
-    df = (
-        df_pivot.filter(pl.col('SEASON') == season)
-    )
-    df_cols = list(df.columns)
-    null_cols = [c for c in df_cols if len(df.filter(pl.col(c).is_not_null())) == 0]
-    df = df.drop(null_cols)
-    df = (
-        pl.concat([df, df.select(pl.all().sum())])
-        .with_row_index('ROW_NUM')
-    )
-    max_row_num = df['ROW_NUM'].max()
-    for c in df.columns[2:]:    
-        df = (
-            df
+#------------------------------------------------------------------------------#
+#     Goal differential race, all seasons and teams in long format             #
+#------------------------------------------------------------------------------#
+# SEASON_GOAL_DIFF is the cumulative sum over('SEASON','team_name') from
+# tweak_df_appearances. Each team starts from 0 at match 0, and season rank
+# and final goal differential are joined once for the end of line annotations
+df_race = (
+    pl.concat([
+        df_appearances
+            .select('SEASON', 'team_name')
+            .unique()
             .with_columns(
-                pl.when(pl.col('ROW_NUM') == max_row_num)
-                .then(pl.lit(0))
-                .otherwise(c)
-                .name.keep()
-            )
-            .sort('MATCH_NUM', descending=False)
-        )
+                MATCH_NUM = pl.lit(0, dtype=pl.UInt32),
+                SEASON_GOAL_DIFF = pl.lit(0, dtype=pl.Int64)
+            ),
+        df_appearances
+            .select('SEASON', 'team_name', 'MATCH_NUM', 'SEASON_GOAL_DIFF')
+            .cast({'MATCH_NUM': pl.UInt32, 'SEASON_GOAL_DIFF': pl.Int64}),
+    ])
+    .join(df_table.select('SEASON', 'team_name', 'RANK', 'GD'), on=['SEASON', 'team_name'], how='left')
+    .with_columns(LAST_MATCH = pl.col('MATCH_NUM').max().over('SEASON'))
+    .sort('SEASON', 'team_name', 'MATCH_NUM')
+)
 
-    y_cols = df.columns[3:]
+for (season,), df in df_race.partition_by('SEASON', as_dict=True).items():
+    max_row_num = df['LAST_MATCH'][0]
     fig = px.line(
         df,
         x = 'MATCH_NUM',
-        y = df.columns[3:],
+        y = 'SEASON_GOAL_DIFF',
+        color = 'team_name',
         template='plotly_white',
         line_shape='hvh'
     )
 
-    for i, col in enumerate(y_cols):
-        season_rank = (
-            df_table
-            .filter(
-                pl.col('SEASON') == season,
-                pl.col('team_name') == col
-            )
-            .select(pl.col('RANK'))
-            .to_series()
-        )[0]
-        goal_differential = (
-            df_table
-            .filter(
-                pl.col('SEASON') == season,
-                pl.col('team_name') == col
-            )
-            .select(pl.col('GD'))
-            .to_series()
-        )[0]
-        # print(f'{goal_differential = }')
+    df_labels = (
+        df
+        .filter(pl.col('MATCH_NUM') == pl.col('MATCH_NUM').max().over('team_name'))  # each team's final match
+        .with_columns(
+            ANNOTATE_TEXT = 
+                pl.col('team_name').str.replace('Women', '').str.replace('Ladies', '') + 
+                pl.format('({}, Goal Diff. = {})', 'RANK', 'GD')
+        )
+    )
+    for i, (annotate_text, y_final) in enumerate(
+            df_labels.select('ANNOTATE_TEXT', 'SEASON_GOAL_DIFF').iter_rows()):
         my_color = px.colors.qualitative.Plotly[i%10]
-        annotate_text = col.replace('Women', '').replace('Ladies', '') + f'({season_rank}, Goal Diff. = {goal_differential})'
-        y_final = df.filter(pl.col('MATCH_NUM') == max_row_num)[col][0]
         fig = custom_annotation(fig, annotate_text, False, max_row_num+0.2, y_final, 'left',  'middle',  0, 0, 'left', my_color=my_color) 
 
     x_label = "MATCH NUMBER<br><sup>"
@@ -179,3 +157,44 @@ for season in df_pivot['SEASON'].unique().to_list():
     )
 
     fig.show()   
+
+#------------------------------------------------------------------------------#
+#     Bump chart, league position after each matchday of the latest season     #
+#------------------------------------------------------------------------------#
+# table after every matchday of every season and tier, cached as parquet
+df_matchday = matchday_standings()
+last_season = df_matchday.filter(pl.col('tier') == 1)['season'].max()
+df_bump = (
+    df_matchday
+    .filter(pl.col('tier') == 1, pl.col('season') == last_season)
+    .sort('team_name', 'MATCHDAY')
+)
+fig = px.line(
+    df_bump,
+    x='MATCHDAY',
+    y='POSITION',
+    color='team_name',
+    markers=True,
+    template='plotly_white',
+    custom_data=['team_name', 'DATE', 'P', 'GD'],
+)
+fig.update_traces(
+    hovertemplate = '<br>'.join([
+        '%{customdata[0]}',
+        '%{customdata[1]|%b %d, %Y}',
+        'Position: %{y}, Points: %{customdata[2]}, Goal Diff.: %{customdata[3]}',
+        '<extra></extra>'
+    ])
+)
+fig.update_layout(
+    autosize=False,
+    width=800,
+    height=600,
+    title=f"English Woman's Football, Tier 1  {last_season} League Position by Matchday",
+    xaxis_title='MATCHDAY',
+    yaxis_title='League Position',
+    legend_title='',
+)
+fig.update_yaxes(autorange='reversed', showgrid=False, dtick=1)
+fig.update_xaxes(showgrid=False)
+fig.show()
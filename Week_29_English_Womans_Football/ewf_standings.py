@@ -0,0 +1,111 @@
+import os
+import polars as pl
+
+#------------------------------------------------------------------------------#
+#     League table after every matchday, all seasons and tiers                 #
+#------------------------------------------------------------------------------#
+# A matchday is a date with at least one match in a season/tier. Every team of
+# a season/tier gets a row on every matchday (teams without a match that day
+# carry their totals forward), so position-over-time and bump charts need no
+# gap filling. Totals are cumulative sums over the date-sorted rows, and the
+# position is the rank within each season, tier and matchday by points, goal
+# difference and goals scored. Point deductions listed in ewf_standings.csv
+# carry no date, so they are applied on the last matchday of each season,
+# before the ranking, and the final table has the official points. The
+# 2019-2020 seasons were curtailed (covid) and their final tables ranked by
+# points per game, so the last matchday of those seasons is ranked the same.
+#
+# The table is cached as parquet and rebuilt only when a csv is newer.
+
+APPEARANCES_CSV = 'ewf_appearances.csv'
+STANDINGS_CSV = 'ewf_standings.csv'
+CACHE_FILE = './cache/ewf_matchday_standings.parquet'
+PPG_SEASONS = ['2019-2020']     # final table ranked by points per game
+
+
+def _build_matchday_standings(csv_path, standings_csv):
+    df_matches = (
+        pl.scan_csv(csv_path)
+        .select(
+            'season', 'tier', 'team_name', 'date',
+            'win', 'draw', 'loss', 'points', 'goals_for', 'goals_against',
+        )
+        .with_columns(
+            SEASON = pl.col('season').str.slice(0,4).cast(pl.Int32),
+            DATE = pl.col('date').str.to_date(format='%m/%d/%Y', strict=True),
+        )
+        # a team can play twice on one date, each matchday has one row per team
+        .group_by('season', 'SEASON', 'tier', 'team_name', 'DATE')
+        .agg(
+            pl.col('win').sum().alias('W'),
+            pl.col('draw').sum().alias('D'),
+            pl.col('loss').sum().alias('L'),
+            pl.col('points').sum().alias('P'),
+            pl.col('goals_for').sum().alias('GF'),
+            pl.col('goals_against').sum().alias('GA'),
+        )
+    )
+    matchdays = df_matches.select('season', 'SEASON', 'tier', 'DATE').unique()
+    teams = df_matches.select('season', 'tier', 'team_name').unique()
+    stat_cols = ['W', 'D', 'L', 'P', 'GF', 'GA']
+    adjustments = (
+        pl.scan_csv(standings_csv)
+        .select('season', 'tier', 'team_name', 'point_adjustment')
+    )
+
+    return (
+        matchdays
+        .join(teams, on=['season', 'tier'])          # every team on every matchday
+        .join(df_matches, on=['season', 'SEASON', 'tier', 'team_name', 'DATE'], how='left')
+        .with_columns(
+            PLAYED = pl.col('W').is_not_null().cast(pl.Int32),
+            *[pl.col(c).fill_null(0) for c in stat_cols],
+        )
+        .sort('season', 'tier', 'team_name', 'DATE')
+        .with_columns(
+            pl.col(['PLAYED'] + stat_cols).cum_sum().over('season', 'tier', 'team_name'),
+            MATCHDAY = pl.col('DATE').rank('dense').over('season', 'tier').cast(pl.Int32),
+        )
+        .join(adjustments, on=['season', 'tier', 'team_name'], how='left')
+        .with_columns(
+            LAST_MATCHDAY = pl.col('DATE') == pl.col('DATE').max().over('season', 'tier')
+        )
+        .with_columns(
+            GD = pl.col('GF') - pl.col('GA'),
+            P = pl.col('P') + pl.when('LAST_MATCHDAY')
+                .then(pl.col('point_adjustment').fill_null(0)).otherwise(0),
+        )
+        .with_columns(
+            RANK_POINTS = pl.when(pl.col('LAST_MATCHDAY') & pl.col('season').is_in(PPG_SEASONS))
+                .then(pl.col('P') / pl.col('PLAYED'))
+                .otherwise(pl.col('P').cast(pl.Float64))
+        )
+        .sort(
+            'season', 'tier', 'DATE', 'RANK_POINTS', 'GD', 'GF', 'team_name',
+            descending=[False, False, False, True, True, True, False]
+        )
+        .with_columns(
+            POSITION = pl.int_range(1, pl.len() + 1, dtype=pl.Int32).over('season', 'tier', 'DATE')
+        )
+        .select(
+            'season', 'SEASON', 'tier', 'MATCHDAY', 'DATE', 'POSITION', 'team_name',
+            'PLAYED', 'W', 'D', 'L', 'P', 'GF', 'GA', 'GD',
+        )
+        .collect()
+    )
+
+
+def matchday_standings(csv_path=APPEARANCES_CSV, standings_csv=STANDINGS_CSV, cache_file=CACHE_FILE):
+    '''
+    Return dataframe with the league table of every season and tier after
+    each matchday. Read from the parquet cache unless a csv is newer.
+    '''
+    if os.path.exists(cache_file) and all(
+        os.path.getmtime(cache_file) >= os.path.getmtime(path)
+        for path in (csv_path, standings_csv)
+    ):
+        return pl.read_parquet(cache_file)
+    df = _build_matchday_standings(csv_path, standings_csv)
+    os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+    df.write_parquet(cache_file)
+    return df
@@ -3,6 +3,8 @@ This script produces:
     - choropleth map of Rural investment by US county
     - Pareto showing investment amounts grouped by state or territory
     - Pareto with investment amounts grouped by region.
+    - Pareto of the top 50 counties, all other counties merged into one bar
+    - sunburst of investment by region, state and county
 
 hover info:
     colorpleth map: county name, state abbreviation, investment amount
@@ -11,12 +13,18 @@ hover info:
 
 pareto by state filtered to only include 50 US states
 pareto by region merged smallest invested regions to group called others
+all paretos show the cumulative % as a line on a secondary y-axis
     
 '''
+import hashlib
+import json
+import os
 import polars as pl   # dataframe library
 import us             # library with USA state info(name, abbr, timezone, etc.)
 import plotly.express as px
+import plotly.graph_objects as go
 from plotly.subplots import make_subplots
+from geometry_store import load_geojson   # local, simplified county geometries
 
 #------------------------------------------------------------------------------#
 #     Functions                                                                #
@@ -48,6 +56,104 @@ def update_layout(
     )
     return fig
     
+def pareto_frame(df, category, value, other_cols=(), top_n=None, others_label='Others'):
+    '''
+    Sum value by category (and other_cols, which must be constant within a
+    category), sort descending and add PCT and CUM_PCT. With top_n, all
+    categories after the first top_n are collapsed into one others_label row.
+    '''
+    group_cols = [category] + list(other_cols)
+    df_pareto = (
+        df.lazy()
+        .group_by(group_cols).agg(pl.col(value).sum())
+        .sort(value, descending=True)
+    )
+    if top_n is not None:
+        df_pareto = (
+            df_pareto
+            .with_columns(
+                pl.when(pl.int_range(pl.len()) < top_n)
+                .then(pl.col(group_cols))
+                .otherwise(pl.lit(others_label))
+            )
+            .group_by(group_cols, maintain_order=True).agg(pl.col(value).sum())
+        )
+    return (
+        df_pareto
+        .with_columns(PCT = 100 * pl.col(value) / pl.col(value).sum())
+        .with_columns(CUM_PCT = pl.col('PCT').cum_sum())
+        .collect()
+    )
+
+def pareto_chart(df_pareto, x, value, color=None, color_map=None, custom_data=None):
+    '''
+    Bars of value in descending order on the primary y axis, CUM_PCT line on
+    a secondary y axis (0 to 100%). Category order is fixed to the order of
+    df_pareto, so coloring bars by group does not reorder them. The line is
+    drawn with WebGL when there are more than 1000 categories.
+    '''
+    fig = make_subplots(specs=[[{'secondary_y': True}]])
+    fig.add_traces(
+        px.bar(
+            df_pareto,
+            x=x,
+            y=value,
+            color=color,
+            color_discrete_map=color_map,
+            custom_data=custom_data,
+        ).data
+    )
+    line_trace = go.Scattergl if len(df_pareto) > 1000 else go.Scatter
+    fig.add_trace(
+        line_trace(
+            x=df_pareto[x],
+            y=df_pareto['CUM_PCT'],
+            name='Cumulative %',
+            mode='lines',
+            line=dict(color='darkslategray', width=2),
+            hovertemplate='Cumulative: %{y:.1f}%<extra></extra>',
+        ),
+        secondary_y=True,
+    )
+    fig.update_layout(template='plotly_white', bargap=0.1)
+    fig.update_xaxes(categoryorder='array', categoryarray=df_pareto[x].to_list())
+    fig.update_yaxes(range=[0, 100], ticksuffix='%', title_text='Cumulative PCT', secondary_y=True)
+    return fig
+    
+def build_hierarchy(df, levels, value):
+    '''
+    Roll value up a hierarchy in one query. levels is a list, coarse to fine,
+    of column lists: the first column of each is the key of that level, the
+    last column is its display label, other columns are carried along. The
+    finest level is grouped from df once, all coarser levels from that rollup.
+    Returns one row per node with LEVEL (0 is coarsest), ID, PARENT and LABEL,
+    ready for sunburst or treemap figures.
+    '''
+    all_cols = [c for level in levels for c in level]
+    df_finest = df.lazy().group_by(all_cols).agg(pl.col(value).sum())
+    keys = [level[0] for level in levels]
+    node_frames = []
+    for depth, level in enumerate(levels):
+        level_cols = [c for lvl in levels[:depth + 1] for c in lvl]
+        node_frames.append(
+            df_finest
+            .group_by(level_cols).agg(pl.col(value).sum())
+            .with_columns(
+                LEVEL = pl.lit(depth, dtype=pl.UInt8),
+                ID = pl.concat_str(keys[:depth + 1], separator='/'),
+                PARENT = (
+                    pl.concat_str(keys[:depth], separator='/')
+                    if depth else pl.lit('')
+                ),
+                LABEL = pl.col(level[-1]).cast(pl.String),
+            )
+        )
+    return (
+        pl.concat(node_frames, how='diagonal')  # shared df_finest plan is computed once
+        .sort('LEVEL', value, descending=[False, True])
+        .collect()
+    )
+    
 #------------------------------------------------------------------------------#
 #     Map time zones to states & territoriess, assign region names             #
 #------------------------------------------------------------------------------# 
@@ -75,44 +181,75 @@ file_path = (
     'main/2024/week-30/rural-investments.csv'
 )
 
-investment_data = (
-    pl.read_csv(file_path, ignore_errors = True)
-    .rename({'State Name': 'state_name'})
-    .with_columns(
-        pl.col('Investment Dollars').str.replace_all(',', '').cast(pl.Float64),
-        state_abbr = pl.col('state_name')
-            .replace(us.states.mapping('name', 'abbr')),
-        region = pl.col('state_name').replace(region_dict)
+# regions shown on their own, all other regions are merged into 'Others'
+kept_regions = ['Puerto Rico', 'Pacific', 'Central', 'Hawaii', 'Mountain', 'Alaska', 'East']
+
+def load_investment_data():
+    '''  read rural investment csv from github, add state abbr and region  '''
+    investment_data = (
+        pl.read_csv(file_path, ignore_errors = True)
+        .rename({'State Name': 'state_name'})
+        .with_columns(
+            pl.col('Investment Dollars').str.replace_all(',', '').cast(pl.Float64),
+            state_abbr = pl.col('state_name')
+                .replace(us.states.mapping('name', 'abbr')),
+            region = pl.col('state_name').replace(region_dict)
+        )
+        .select(
+            'state_name', 'state_abbr', 'County', 
+            'County FIPS', 'region','Investment Dollars'
+        )
     )
-    .select(
-        'state_name', 'state_abbr', 'County', 
-        'County FIPS', 'region','Investment Dollars'
+
+    investment_data = (
+        investment_data
+        .with_columns(
+            region = pl.when(pl.col('region').is_in(kept_regions))
+            .then('region')
+            .otherwise(pl.lit('Others'))
+        )
+
     )
-)
+    return investment_data
 
-investment_data = (
-    investment_data
-    .with_columns(
-        region = pl.when(pl.col('region')
-                .is_in(
-                    ['Puerto Rico', 'Pacific', 'Central', 'Hawaii', 'Mountain', 'Alaska', 'East']))
-        .then('region')
-        .otherwise(pl.lit('Others'))
+#------------------------------------------------------------------------------#
+#     Roll up county -> state -> region once, cache the hierarchy. The cache   #
+#     file name holds a hash of the inputs set in this script, so editing the  #
+#     regions or levels builds a new file. Delete ./cache to re-read the csv   #
+#------------------------------------------------------------------------------#
+hierarchy_levels = [
+    ['region'],
+    ['state_abbr', 'state_name'],
+    ['County FIPS', 'County'],
+]
+hierarchy_key = hashlib.sha1(
+    json.dumps(
+        [file_path, region_dict, kept_regions, hierarchy_levels], sort_keys=True
+    ).encode()
+).hexdigest()[:12]
+hierarchy_file = f'./cache/rural_investment_hierarchy_{hierarchy_key}.parquet'
+if os.path.exists(hierarchy_file):
+    df_hierarchy = pl.read_parquet(hierarchy_file)
+else:
+    df_hierarchy = build_hierarchy(
+        load_investment_data(),
+        levels=hierarchy_levels,
+        value='Investment Dollars',
     )
-   
-)
+    os.makedirs(os.path.dirname(hierarchy_file), exist_ok=True)
+    df_hierarchy.write_parquet(hierarchy_file)
+
+df_by_region = df_hierarchy.filter(pl.col('LEVEL') == 0)
+df_by_state = df_hierarchy.filter(pl.col('LEVEL') == 1)
+df_by_county = df_hierarchy.filter(pl.col('LEVEL') == 2)
 
 #------------------------------------------------------------------------------#
 #     Create choropleth map                                                    #
 #------------------------------------------------------------------------------#
-grouped_by_county = (
-    investment_data.group_by('state_abbr', 'County', 'County FIPS').sum()
-)
-geojson_path = 'https://raw.githubusercontent.com/plotly/datasets/master'
-geojson_file = 'geojson-counties-fips.json'
+# county outlines simplified for a national map, cached in ./cache after 1st run
 fig = px.choropleth(
-    grouped_by_county,
-    geojson=f'{geojson_path}/{geojson_file}',
+    df_by_county,
+    geojson=load_geojson('counties', lod='national'),
     locations='County FIPS',
     color='Investment Dollars',
     color_continuous_scale="Viridis",
@@ -141,40 +278,28 @@ fig.show()
 #------------------------------------------------------------------------------#
 # keys are regions, values are colors.  for the 'other' region, hardcode gray
 my_colors = px.colors.qualitative.Dark24
-my_regions = sorted(investment_data['region'].unique().to_list())
+my_regions = sorted(df_by_region['region'].to_list())
 my_color_dict = dict(zip(my_regions, my_colors))
 my_color_dict['Others'] = 'gray'
 
 #------------------------------------------------------------------------------#
 #     Pareto: data grouped by USA state                                        #
 #------------------------------------------------------------------------------#
-grouped_by_state = (
-    investment_data
-    .select('state_name', 'state_abbr', 'Investment Dollars', 'region')
-    .group_by('state_name', 'state_abbr', 'region').sum()
-    .sort('Investment Dollars', descending=True)
-    .with_columns(
-        CUM_PCT = 
-        (100 * pl.col('Investment Dollars')/pl.col('Investment Dollars').sum())
-        .cum_sum()
-    )
-    .filter(pl.col('state_name').is_in([str(s) for s in list(us.states.STATES)]))
+grouped_by_state = pareto_frame(
+    df_by_state
+    .filter(pl.col('state_name').is_in([str(s) for s in list(us.states.STATES)])),
+    'state_abbr', 'Investment Dollars', other_cols=['state_name', 'region']
 )
 
-fig = px.bar(
-    grouped_by_state.sort('Investment Dollars', descending=True),
-    x = 'state_abbr',
-    y = 'Investment Dollars',
-    template='plotly_white',
+fig = pareto_chart(
+    grouped_by_state,
+    'state_abbr',
+    'Investment Dollars',
     color='region',
-    color_discrete_map=my_color_dict,
+    color_map=my_color_dict,
     custom_data=['state_name','Investment Dollars', 'CUM_PCT']
 )
 
-# Set y-axes titles
-fig.update_yaxes(title_text="<b>primary</b> Investment Dollars", secondary_y=False)
-fig.update_yaxes(title_text="<b>secondary</b> Cumulative PCT", secondary_y=True)
-
 # add custom hover information
 fig.update_traces(
     hovertemplate="<br>".join([
@@ -182,7 +307,8 @@ fig.update_traces(
         '$%{customdata[1]:,d}',
         'Cumulative: %{customdata[2]:.1f}%',
         '<extra></extra>'
-    ])
+    ]),
+    selector=dict(type='bar')
 )
 fig = update_layout(
     fig, 'USA Rural Investment by States & Territories - 2024', 600, 1200, 
@@ -198,33 +324,19 @@ annotation = '<b>Data Source:</b> US Department of Agriculture<br>'
 annotation += 'states & territories are color coded by region<br>'
 add_annotation(fig, annotation, 0.5, 0.8, 'left', 'right', 'top')
 
-# chart gets reordered after applying colors, next line restores intended order
-fig.update_xaxes(categoryorder='total descending')
-
 fig.show()
 
 #------------------------------------------------------------------------------#
 #     Pareto: data grouped by region                                           #
 #------------------------------------------------------------------------------#
-grouped_by_region = (
-    investment_data
-    .select('region', 'Investment Dollars')
-    .group_by('region').sum()
-    .sort('Investment Dollars', descending=True)
-    .with_columns(
-        CUM_PCT = 
-        (100 * pl.col('Investment Dollars')/pl.col('Investment Dollars').sum())
-        .cum_sum()
-    )
-)
+grouped_by_region = pareto_frame(df_by_region, 'region', 'Investment Dollars')
 
-fig = px.bar(
-    grouped_by_region.sort('Investment Dollars', descending=True),
+fig = pareto_chart(
+    grouped_by_region,
     'region',
-    y = 'Investment Dollars',
-    template='plotly_white',
+    'Investment Dollars',
     color='region',
-    color_discrete_map=my_color_dict,
+    color_map=my_color_dict,
     custom_data=['region','Investment Dollars', 'CUM_PCT'],
 )
 
@@ -235,7 +347,8 @@ fig.update_traces(
         '$%{customdata[1]:,d}',
         'Cumulative: %{customdata[2]:.1f}%',
         '<extra></extra>'
-    ])
+    ]),
+    selector=dict(type='bar')
 )
 
 fig = update_layout(
@@ -254,3 +367,59 @@ annotation += 'states that do not observe daylight saving time.<br><br>'
 annotation += "<b>'Others'</b> incudes Virgin Islands, Guam, Samoa & Palua"
 add_annotation(fig, annotation, 0.9, 0.8, 'left', 'right', 'top')
 fig.show()
+
+#------------------------------------------------------------------------------#
+#     Pareto: data grouped by county, top 50 counties and all others           #
+#------------------------------------------------------------------------------#
+grouped_by_county_pareto = pareto_frame(
+    df_by_county
+    .with_columns(COUNTY_STATE = pl.col('County') + ', ' + pl.col('state_abbr')),
+    'COUNTY_STATE', 'Investment Dollars', top_n=50, others_label='All other counties'
+)
+
+fig = pareto_chart(
+    grouped_by_county_pareto,
+    'COUNTY_STATE',
+    'Investment Dollars',
+    custom_data=['COUNTY_STATE','Investment Dollars', 'CUM_PCT'],
+)
+fig.update_traces(
+    hovertemplate="<br>".join([
+        '%{customdata[0]}',
+        '$%{customdata[1]:,d}',
+        'Cumulative: %{customdata[2]:.1f}%',
+        '<extra></extra>'
+    ]),
+    selector=dict(type='bar')
+)
+fig = update_layout(
+    fig, 'USA Rural Investment by County, Top 50 - 2024', 600, 1200,
+    my_xtitle='County',
+    my_ytitle='Investment (US$)',
+)
+fig.update_xaxes(showgrid=False, tickangle=-90)
+fig.update_yaxes(showgrid=False)
+fig.show()
+
+#------------------------------------------------------------------------------#
+#     Sunburst: region -> state -> county, from the cached hierarchy           #
+#------------------------------------------------------------------------------#
+fig = go.Figure(
+    go.Sunburst(
+        ids=df_hierarchy['ID'],
+        parents=df_hierarchy['PARENT'],
+        labels=df_hierarchy['LABEL'],
+        values=df_hierarchy['Investment Dollars'],
+        branchvalues='total',
+        maxdepth=2,     # click a state to drill down to its counties
+        marker=dict(
+            colors=df_hierarchy['region'].replace_strict(my_color_dict, default='gray')
+        ),
+        hovertemplate='%{label}<br>$%{value:,.0f}<br>%{percentRoot:.1%} of total<extra></extra>',
+    )
+)
+fig = update_layout(fig, 'USA Rural Investment by Region, State & County - 2024', 800, 800)
+annotation = '<b>Data Source:</b> US Department of Agriculture<br>'
+annotation += 'click a region or state to drill down'
+add_annotation(fig, annotation, 0.0, 1.0, 'left', 'left', 'top')
+fig.show()
@@ -0,0 +1,279 @@
+import json
+import os
+import sys
+import urllib.request
+import numpy as np
+
+#------------------------------------------------------------------------------#
+#     Local store of simplified county and state geometries                    #
+#------------------------------------------------------------------------------#
+# px.choropleth given a geojson url makes the browser download the full
+# resolution file on every render. This module downloads each source file
+# once into ./cache, then simplifies and quantizes it and caches the result,
+# so figures embed a small geojson dict and render offline. Simplified
+# files committed to ./geometry (see vendor_geometry) are used first, so the
+# maps need no download at all. Downloads and cache files are written to a
+# temporary file and moved into place, an interrupted run leaves no
+# truncated file behind.
+#
+# Quantization snaps coordinates to a grid of 10**-digits degrees (the idea
+# behind TopoJSON quantization), which shrinks the json text and makes the
+# vertices of shared borders compare exactly equal. Simplification is
+# Douglas-Peucker with the TopoJSON trick for keeping neighbours gap free:
+# vertices where the set of polygons sharing a border changes (junctions) are
+# always kept, and each border between junctions is simplified the same way
+# for both polygons that share it. Rings start at arbitrary vertices in the
+# source files, so each ring is rotated to start at a junction first. Run
+# this file to check a shared border keeps the same vertices on both sides.
+
+CACHE_DIR = './cache'
+VENDOR_DIR = './geometry'     # simplified geometry committed to the repo
+
+geojson_sources = {
+    'counties': 'https://raw.githubusercontent.com/plotly/datasets/master/geojson-counties-fips.json',
+    'states': 'https://raw.githubusercontent.com/python-visualization/folium/main/examples/data/us-states.json',
+}
+
+# simplification tolerance in degrees for each level of detail. Zoomed out
+# national maps need far fewer vertices than maps zoomed to a single state
+lod_tolerance = {
+    'national': 0.02,
+    'regional': 0.005,
+    'state': 0.001,
+    'full': 0.0,
+}
+
+_loaded = {}   # geometries already loaded in this session
+
+
+def _rings(geometry):
+    '''  list of coordinate lists of all rings of a Polygon or MultiPolygon '''
+    if geometry['type'] == 'Polygon':
+        return geometry['coordinates']
+    if geometry['type'] == 'MultiPolygon':
+        return [ring for polygon in geometry['coordinates'] for ring in polygon]
+    return []
+
+
+def _douglas_peucker(points, tolerance):
+    '''  boolean mask of points kept by Douglas-Peucker, end points always kept '''
+    keep = np.zeros(len(points), dtype=bool)
+    keep[[0, -1]] = True
+    stack = [(0, len(points) - 1)]
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+        start, end = points[first], points[last]
+        segment = end - start
+        inner = points[first + 1:last] - start
+        length = np.hypot(*segment)
+        if length == 0:
+            distance = np.hypot(inner[:, 0], inner[:, 1])
+        else:
+            distance = np.abs(segment[0] * inner[:, 1] - segment[1] * inner[:, 0]) / length
+        i = int(np.argmax(distance))
+        if distance[i] > tolerance:
+            keep[first + 1 + i] = True
+            stack.extend([(first, first + 1 + i), (first + 1 + i, last)])
+    return keep
+
+
+def _simplify_arc(points, tolerance):
+    '''
+    Douglas-Peucker mask of an arc, always run from the lexicographically
+    smaller end, so an arc shared by two rings (traversed in opposite
+    directions) keeps the same vertices in both, ties included.
+    '''
+    first, last = tuple(points[0]), tuple(points[-1])
+    if last < first or (last == first and tuple(points[-2]) < tuple(points[1])):
+        return _douglas_peucker(points[::-1], tolerance)[::-1]
+    return _douglas_peucker(points, tolerance)
+
+
+def _lexicographic_min(points, candidates):
+    '''  index of the smallest (x, y) point among candidate indexes '''
+    order = np.lexsort((points[candidates, 1], points[candidates, 0]))
+    return candidates[order[0]]
+
+
+def _simplify_ring(ring, vertex_rings, tolerance, scale):
+    '''
+    Return closed ring simplified to tolerance. The ring is split into arcs at
+    its junctions, vertices next to a change in the set of rings using them,
+    and each arc is simplified on its own. The ring is rotated to start at a
+    junction, so its arbitrary start vertex is not a break point the
+    neighbouring ring lacks. A ring without junctions (an island, or a ring
+    sharing its whole outline with one other ring) is split at two vertices
+    both rings find the same way: the smallest (x, y) vertex and the vertex
+    farthest from it.
+    '''
+    points = ring[:-1] if np.array_equal(ring[0], ring[-1]) else ring
+    n = len(points)
+    owners = [frozenset(vertex_rings[v]) for v in map(tuple, points)]
+    junctions = np.flatnonzero([
+        owners[i] != owners[i - 1] or owners[i] != owners[(i + 1) % n]
+        for i in range(n)
+    ])
+    if len(junctions) == 0:
+        start = _lexicographic_min(points, np.arange(n))
+        distance = ((points - points[start]) ** 2).sum(axis=1)
+        far = _lexicographic_min(points, np.flatnonzero(distance == distance.max()))
+        junctions = np.sort([start, far])
+    points = np.roll(points, -junctions[0], axis=0)
+    junctions = junctions - junctions[0]
+    points = np.vstack([points, points[:1]])     # closed again, ends at the start
+    breaks = np.append(junctions, n)
+    keep = np.zeros(n + 1, dtype=bool)
+    keep[breaks] = True
+    for first, last in zip(breaks[:-1], breaks[1:]):
+        keep[first:last + 1] |= _simplify_arc(points[first:last + 1] / scale, tolerance)
+    # rings simplified below a triangle are kept at full resolution
+    return points[keep] if keep.sum() >= 4 else ring
+
+
+def quantize_and_simplify(geojson, tolerance, digits=4):
+    '''
+    Return new geojson with coordinates snapped to 10**-digits degrees and
+    rings simplified to tolerance (degrees), keeping shared borders aligned.
+    '''
+    scale = 10 ** digits
+    rings = [
+        np.round(np.asarray(ring, dtype=float)[:, :2] * scale).astype(np.int64)
+        for feature in geojson['features']
+        for ring in _rings(feature['geometry'])
+    ]
+    # drop repeated vertices created by snapping to the grid
+    rings = [
+        ring[np.concatenate([[True], np.any(np.diff(ring, axis=0) != 0, axis=1)])]
+        for ring in rings
+    ]
+
+    # which rings use each vertex
+    vertex_rings = {}
+    for ring_id, ring in enumerate(rings):
+        for vertex in map(tuple, ring):
+            vertex_rings.setdefault(vertex, set()).add(ring_id)
+
+    simplified = [
+        ring if len(ring) <= 4 or tolerance == 0
+        else _simplify_ring(ring, vertex_rings, tolerance, scale)
+        for ring in rings
+    ]
+
+    # write simplified rings back into a copy of the geojson structure
+    ring_iter = iter(simplified)
+    def rebuild(ring_count):
+        return [(next(ring_iter) / scale).round(digits).tolist() for _ in range(ring_count)]
+
+    features = []
+    for feature in geojson['features']:
+        geometry = feature['geometry']
+        if geometry['type'] == 'Polygon':
+            coordinates = rebuild(len(geometry['coordinates']))
+        elif geometry['type'] == 'MultiPolygon':
+            coordinates = [rebuild(len(polygon)) for polygon in geometry['coordinates']]
+        else:
+            coordinates = geometry['coordinates']
+        features.append({
+            **feature,
+            'geometry': {'type': geometry['type'], 'coordinates': coordinates},
+        })
+    return {**geojson, 'features': features}
+
+
+def _replace_atomic(path, write):
+    '''  call write(temp_path), then move the finished file to path '''
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = f'{path}.part'
+    try:
+        write(temp_path)
+        os.replace(temp_path, path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+def _write_json(path, data):
+    def write(temp_path):
+        with open(temp_path, 'w') as f:
+            json.dump(data, f, separators=(',', ':'))
+    _replace_atomic(path, write)
+
+
+def load_geojson(name, lod='national', digits=4, cache_dir=CACHE_DIR, vendor_dir=VENDOR_DIR):
+    '''
+    Return geojson dict for 'counties' or 'states' at level of detail lod
+    (a key of lod_tolerance). Served from memory, then from the committed
+    vendor folder, then from the cache folder, and only built from the
+    source file when none has it. vendor_dir None skips the vendor folder.
+    '''
+    key = (name, lod, digits)
+    if key in _loaded:
+        return _loaded[key]
+
+    file_name = f'{name}_{lod}_q{digits}.json'
+    for folder in filter(None, (vendor_dir, cache_dir)):
+        if os.path.exists(os.path.join(folder, file_name)):
+            with open(os.path.join(folder, file_name)) as f:
+                _loaded[key] = json.load(f)
+            return _loaded[key]
+
+    source_file = os.path.join(cache_dir, f'{name}.json')
+    if not os.path.exists(source_file):
+        _replace_atomic(
+            source_file,
+            lambda temp_path: urllib.request.urlretrieve(geojson_sources[name], temp_path),
+        )
+    with open(source_file, 'rb') as f:
+        raw = f.read()
+    try:
+        geojson = json.loads(raw.decode('utf-8'))
+    except UnicodeDecodeError:    # the counties file has latin-1 county names
+        geojson = json.loads(raw.decode('latin-1'))
+
+    _loaded[key] = quantize_and_simplify(geojson, lod_tolerance[lod], digits)
+    _write_json(os.path.join(cache_dir, file_name), _loaded[key])
+    return _loaded[key]
+
+
+def vendor_geometry(lods=('national',), digits=4, vendor_dir=VENDOR_DIR):
+    '''
+    Write simplified counties and states at each level of detail in lods to
+    vendor_dir, to be committed with the repo. Needs the source files once.
+    '''
+    for name in geojson_sources:
+        for lod in lods:
+            _write_json(
+                os.path.join(vendor_dir, f'{name}_{lod}_q{digits}.json'),
+                load_geojson(name, lod, digits, vendor_dir=None),
+            )
+
+
+def check_shared_border(tolerance=0.01):
+    '''
+    Assert two squares sharing a wiggly edge at x ~ 1 keep the same vertices
+    on that edge after simplification, with ring B starting mid-edge.
+    '''
+    edge = [[1, 0], [1.0005, 0.25], [0.999, 0.5], [1.0005, 0.75], [1, 1]]
+    ring_a = [[0, 0]] + edge + [[0, 1], [0, 0]]
+    ring_b = edge[2::-1] + [[2, 0], [2, 1]] + edge[:1:-1]
+    squares = {
+        'type': 'FeatureCollection',
+        'features': [
+            {'type': 'Feature', 'id': name, 'geometry': {'type': 'Polygon', 'coordinates': [ring]}}
+            for name, ring in (('A', ring_a), ('B', ring_b))
+        ],
+    }
+    on_edge = [
+        {tuple(v) for v in feature['geometry']['coordinates'][0] if abs(v[0] - 1) < 0.01}
+        for feature in quantize_and_simplify(squares, tolerance)['features']
+    ]
+    assert on_edge[0] == on_edge[1], on_edge
+    print(f'shared border keeps the same vertices on both sides: {sorted(on_edge[0])}')
+
+
+if __name__ == '__main__':
+    check_shared_border()
+    if '--vendor' in sys.argv:
+        vendor_geometry()
@@ -1,6 +1,7 @@
 import polars as pl
 import plotly.express as px
-import pycountry
+from survey_loader import load_survey
+from multi_select import crosstab
 
 #  Functions
 def add_annotation(fig, annotation, x, y, align, xanchor, yanchor):
@@ -15,15 +16,20 @@ def add_annotation(fig, annotation, x, y, align, xanchor, yanchor):
 
 ## NOTES: THIS CSV IS STORED AS A ZIP FILE TO SAVE SPACE AND TO OBEY THE RULES
 ##        OF GIT FILE SIZES. YOU HAVE TO UNCOMPRESS THE CSV TO RUN THIS SCRIPT
-df_csv = pl.read_csv(
-    f'./Dataset/survey_results_public.csv',
-    ignore_errors=True
+#  typed columns are cached as parquet after the first run, see survey_loader
+df_csv = load_survey(
+    'Age', 'AISent', 'Country', 'YearsCodePro', 'LanguageHaveWorkedWith'
 )
 
-#  create dictionary with countrys as keys, abbreviations as values
-dict_countries = {}
-for item in pycountry.countries:
-    dict_countries[item.name] = item.alpha_3
+#  create dictionary with countrys as keys, abbreviations as values. Country
+#  names and their aliases come from the shared pycountry reference table
+dict_countries = dict(
+    pl.scan_parquet('../Shared_Reference_Data/countries.parquet')
+    .select(pl.concat_list('NAME', 'ALIASES').alias('COUNTRY'), 'ALPHA_3')
+    .explode('COUNTRY')
+    .collect()
+    .iter_rows()
+)
 
 #------------------------------------------------------------------------------#
 #     AI bias by age group                                                     #
@@ -31,14 +37,14 @@ for item in pycountry.countries:
 df_ai_age_pct =  (  # create and process dataframe
     df_csv.lazy()   # polars lazy frames 
     .select('Age', 'AISent')
-    .filter(~pl.col('Age').is_in(['Prefer not to say','NA']))
+    .filter(~pl.col('Age').is_in(['Prefer not to say']))   # NA is null, dropped here
     .with_columns(
-        Age = pl.col('Age')
+        Age = pl.col('Age').cast(pl.String)
             .str.replace('Under 18 years old', '-17')
             .str.replace(' years old', '')
             .str.replace('65 years or older', '65-'),
     )
-    .with_columns(pl.col('AISent').str.replace('Very favorable','Favorable'))
+    .with_columns(pl.col('AISent').cast(pl.String).str.replace('Very favorable','Favorable'))
     .with_columns(pl.col('AISent').str.replace('favorable','Favorable'))
     .with_columns(pl.col('AISent').str.replace('favorable','Favorable'))
     .with_row_index()
@@ -99,20 +105,65 @@ fig = add_annotation(fig, annotation, 0.5, 1.0, 'left', 'left', 'top')
 fig.show()
 print('\n\n\n')
 
+#------------------------------------------------------------------------------#
+#     AI favorability by language worked with and age group                    #
+#------------------------------------------------------------------------------#
+#  crosstab counts every language answer for every age/sentiment group with one
+#  sparse matrix product, see multi_select.py
+df_ai_lang_age = (
+    crosstab(
+        df_csv.filter(~pl.col('Age').is_in(['Prefer not to say'])),
+        'LanguageHaveWorkedWith',
+        ['Age', 'AISent']
+    )
+    .filter(pl.col('Age').is_not_null())
+    .with_columns(
+        Age = pl.col('Age').cast(pl.String)
+            .str.replace('Under 18 years old', '-17')
+            .str.replace(' years old', '')
+            .str.replace('65 years or older', '65-'),
+        FAVORABLE = pl.col('AISent').is_in(['Very favorable', 'Favorable']),
+    )
+    .group_by('Age', 'LanguageHaveWorkedWith')
+    .agg(
+        USERS = pl.col('COUNT').sum(),
+        PCT = 100 * pl.col('COUNT').filter('FAVORABLE').sum() / pl.col('COUNT').sum(),
+    )
+    .with_columns(LANGUAGE_USERS = pl.col('USERS').sum().over('LanguageHaveWorkedWith'))
+    .filter(pl.col('LANGUAGE_USERS').rank('dense', descending=True) <= 15)
+    .sort('LANGUAGE_USERS', 'Age', descending=[True, False])
+    .pivot(on='Age', index='LanguageHaveWorkedWith', values='PCT')
+)
+
+fig = px.imshow(
+    df_ai_lang_age.drop('LanguageHaveWorkedWith'),
+    y=df_ai_lang_age['LanguageHaveWorkedWith'].cast(pl.String).to_list(),
+    color_continuous_scale='Blues',
+    text_auto='.0f',
+    aspect='auto',
+)
+fig.update_layout(
+    title = 'AI Favorabilty by Language and Age<br><sup>15 most used languages</sup>',
+    height=600, width=800,
+    xaxis_title='Age Group',
+    yaxis_title='',
+    coloraxis_colorbar_title='Favorable (%)',
+    template='plotly_white',
+)
+fig.show()
+print('\n\n\n')
+
 #------------------------------------------------------------------------------#
 #     Average years of professional coding experience by country
 #------------------------------------------------------------------------------#
 df_coding_years = (   #  prepare dataframe 
     df_csv
     .select('Country', 'YearsCodePro')
-    .filter(~pl.col('YearsCodePro').is_in(['NA']))
+    .filter(pl.col('YearsCodePro').is_not_null())   # loader reads NA as null
     #     Change country names for USA and UK to match values used by pycountry 
-    .with_columns(pl.col('Country').str.replace('United States of America', 'United States'))
+    .with_columns(pl.col('Country').cast(pl.String).str.replace('United States of America', 'United States'))
     .with_columns(pl.col('Country').str.replace('United Kingdom of Great Britain', 'United Kingdom'))
     .with_columns(pl.col('Country').str.replace('United Kingdom and Northern Ireland', 'United Kingdom'))
-    .with_columns(pl.col('YearsCodePro').str.replace('Less than 1 year', '0'))
-    .with_columns(pl.col('YearsCodePro').str.replace('More than 50 years', '50'))
-    .with_columns(pl.col('YearsCodePro').cast(pl.UInt16))
 )
 #  list countries with 1000 or more survey participants
 countries_1k = (
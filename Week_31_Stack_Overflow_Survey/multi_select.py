@@ -0,0 +1,69 @@
+import numpy as np
+import polars as pl
+from scipy import sparse
+
+#------------------------------------------------------------------------------#
+#     Multi-select answers as sparse indicator matrices                        #
+#------------------------------------------------------------------------------#
+# survey_loader returns multi-select columns like LanguageHaveWorkedWith as
+# List(Enum). The Enum categories are the vocabulary of the column (cached in
+# the parquet file), and the physical Enum codes are the column numbers of the
+# indicator matrix, so a column converts in one pass without string matching.
+
+def vocabulary(s):
+    '''  answer choices of a List(Enum) column, in indicator column order '''
+    return s.dtype.inner.categories
+
+
+def explode_multi_select(df, col):
+    '''  long format, one row per respondent and selected answer, Enum typed '''
+    return df.explode(col).filter(pl.col(col).is_not_null())
+
+
+def indicator_matrix(s):
+    '''
+    Return sparse csr matrix, one row per respondent and one column per
+    answer choice, 1 where the respondent selected that answer.
+    '''
+    s = s.list.drop_nulls()    # lengths and indices both without null answers
+    lengths = s.list.len().fill_null(0).to_numpy()
+    indptr = np.concatenate([[0], np.cumsum(lengths)])
+    indices = s.explode().drop_nulls().to_physical().to_numpy()
+    matrix = sparse.csr_matrix(
+        (np.ones(len(indices), dtype=np.int32), indices, indptr),
+        shape=(len(s), len(vocabulary(s))),
+    )
+    matrix.sum_duplicates()
+    matrix.data[:] = 1       # an answer counts once per respondent
+    return matrix
+
+
+def crosstab(df, multi_col, by):
+    '''
+    Count respondents per group of the columns in list by, for each answer of
+    multi-select column multi_col. Groups are one-hot encoded as a sparse
+    (groups x respondents) matrix, so all counts come from one sparse product
+    with the indicator matrix. Returns long dataframe with the by columns,
+    multi_col, COUNT and RESPONDENTS (respondents in the group).
+    '''
+    df = df.with_columns(GROUP_ID = pl.struct(by).rank('dense').cast(pl.Int64) - 1)
+    df_groups = df.select(by + ['GROUP_ID']).unique('GROUP_ID').sort('GROUP_ID')
+
+    group_id = df['GROUP_ID'].to_numpy()
+    group_matrix = sparse.csr_matrix(
+        (np.ones(len(group_id), dtype=np.int32), (group_id, np.arange(len(group_id)))),
+        shape=(len(df_groups), len(group_id)),
+    )
+    counts = (group_matrix @ indicator_matrix(df[multi_col])).toarray()
+    choices = vocabulary(df[multi_col])
+
+    return (
+        df_groups
+        .with_columns(
+            pl.Series(multi_col, [choices.to_list()] * len(df_groups), dtype=df[multi_col].dtype),
+            RESPONDENTS = pl.Series(np.asarray(group_matrix.sum(axis=1)).ravel()),
+            COUNT = pl.Series(counts.tolist(), dtype=pl.List(pl.Int64)),
+        )
+        .explode(multi_col, 'COUNT')
+        .drop('GROUP_ID')
+    )
@@ -0,0 +1,157 @@
+import os
+import polars as pl
+
+#------------------------------------------------------------------------------#
+#     Typed, cached loader for the Stack Overflow survey csv                   #
+#------------------------------------------------------------------------------#
+# The survey csv has ~85 columns and ~90k rows, all answers stored as text.
+# Charts only need a few columns, so each column is scanned on its own (the
+# lazy scan pushes the projection down to the csv reader), encoded once, and
+# written to a parquet file under ./Dataset/cache, named after the csv and
+# the column. Later runs read the typed parquet instead of parsing the csv. A
+# cache file is rebuilt when the csv is newer than it, and still used once
+# the csv is removed (it is kept zipped).
+#
+# Encoding rules:
+#   - 'NA' is read as null
+#   - numeric columns are cast to numbers, text like 'Less than 1 year' mapped
+#   - multi_select_columns (semicolon delimited) become List(Enum)
+#   - all other answers (single select, Likert) become Enum
+# Ordinal answers (age bands, Likert scales, frequencies) have their Enum
+# categories in the order of ordered_categories, so sorting and plotting by
+# category follow the scale. Answers not listed there are appended, sorted.
+# Other columns use their vocabulary, sorted. Categories are stored in the
+# parquet file with the data.
+
+SURVEY_CSV = './Dataset/survey_results_public.csv'
+CACHE_DIR = './Dataset/cache'
+
+numeric_columns = {
+    'ResponseId': pl.UInt32,
+    'CompTotal': pl.Float64,
+    'ConvertedCompYearly': pl.Float64,
+    'WorkExp': pl.Float32,
+    'YearsCode': pl.UInt16,
+    'YearsCodePro': pl.UInt16,
+}
+numeric_text = {    # text answers in otherwise numeric columns
+    'Less than 1 year': '0',
+    'More than 50 years': '50',
+}
+MULTI_SELECT_SEPARATOR = ';'
+
+_tech = [
+    'Language', 'Database', 'Platform', 'Webframe', 'MiscTech', 'ToolsTech',
+    'NEWCollabTools', 'OfficeStackAsync', 'OfficeStackSync', 'AISearch', 'AIDev',
+]
+multi_select_columns = {
+    'Employment', 'CodingActivities', 'LearnCode', 'LearnCodeOnline',
+    'LearnCodeCoursesCert', 'BuyNewTool', 'OpSysPersonal use',
+    'OpSysProfessional use', 'NEWSOSites', 'AIAcc', 'ProfessionalTech',
+    'AIToolInterested in Using', 'AIToolCurrently Using',
+    'AIToolNot interested in Using', 'AINextVery different',
+    'AINextNeither different nor similar', 'AINextSomewhat similar',
+    'AINextVery similar', 'AINextSomewhat different',
+    *[f'{tech}{usage}' for tech in _tech for usage in ('HaveWorkedWith', 'WantToWorkWith')],
+}
+
+_agree = ['Strongly agree', 'Agree', 'Neither agree nor disagree', 'Disagree', 'Strongly disagree']
+_visit_freq = [
+    'Multiple times per day', 'Daily or almost daily', 'A few times per week',
+    'A few times per month or weekly', 'Less than once per month or monthly',
+]
+ordered_categories = {
+    'Age': [
+        'Under 18 years old', '18-24 years old', '25-34 years old', '35-44 years old',
+        '45-54 years old', '55-64 years old', '65 years or older', 'Prefer not to say',
+    ],
+    'AISent': [
+        'Very favorable', 'Favorable', 'Indifferent', 'Unfavorable',
+        'Very unfavorable', 'Unsure',
+    ],
+    'AIBen': [
+        'Highly trust', 'Somewhat trust', 'Neither trust nor distrust',
+        'Somewhat distrust', 'Highly distrust',
+    ],
+    'AISelect': ['Yes', 'No, but I plan to soon', "No, and I don't plan to"],
+    'SOVisitFreq': _visit_freq,
+    'SOPartFreq': _visit_freq + ['I have never participated in Q&A on Stack Overflow'],
+    'TimeSearching': [
+        'Less than 15 minutes a day', '15-30 minutes a day', '30-60 minutes a day',
+        '60-120 minutes a day', 'Over 120 minutes a day',
+    ],
+    'SurveyLength': ['Too short', 'Appropriate in length', 'Too long'],
+    'SurveyEase': ['Easy', 'Neither easy nor difficult', 'Difficult'],
+    **{f'Knowledge_{i}': _agree for i in range(1, 9)},
+    **{f'Frequency_{i}': [
+        'Never', '1-2 times a week', '3-5 times a week', '6-10 times a week', '10+ times a week',
+    ] for i in range(1, 4)},
+}
+ordered_categories['TimeAnswering'] = ordered_categories['TimeSearching']
+
+_loaded = {}   # columns already loaded in this session
+
+
+def _encode(s):
+    '''  return typed version of survey column s, read as strings '''
+    if s.name in numeric_columns:
+        return (
+            s.replace(numeric_text)
+            .cast(numeric_columns[s.name], strict=False)
+        )
+    if s.name in multi_select_columns:
+        s = s.str.split(MULTI_SELECT_SEPARATOR)
+        vocabulary = s.explode().drop_nulls().unique().sort()
+        return s.cast(pl.List(pl.Enum(vocabulary)))
+    vocabulary = s.drop_nulls().unique().sort()
+    if s.name in ordered_categories:
+        order = ordered_categories[s.name]
+        vocabulary = order + [answer for answer in vocabulary if answer not in order]
+    return s.cast(pl.Enum(vocabulary))
+
+
+def _cache_file(col, csv_path, cache_dir):
+    '''  parquet file of one column, named after the csv it was read from '''
+    csv_stem = os.path.splitext(os.path.basename(csv_path))[0]
+    return os.path.join(cache_dir, f'{csv_stem}_{col}.parquet')
+
+
+def _is_cached(col, csv_path, cache_dir):
+    '''  cache file exists, and is newer than the csv or the csv was removed '''
+    cache_file = _cache_file(col, csv_path, cache_dir)
+    return os.path.exists(cache_file) and (
+        not os.path.exists(csv_path) or
+        os.path.getmtime(cache_file) >= os.path.getmtime(csv_path)
+    )
+
+
+def load_survey(*columns, csv_path=SURVEY_CSV, cache_dir=CACHE_DIR):
+    '''
+    Return dataframe of the requested survey columns, typed per the encoding
+    rules above. Columns not yet cached are parsed from the csv in a single
+    scan, all others are served from memory or from the parquet cache.
+    '''
+    wanted = [col for col in columns if (csv_path, col) not in _loaded]
+    from_cache = [col for col in wanted if _is_cached(col, csv_path, cache_dir)]
+    from_csv = [col for col in wanted if col not in from_cache]
+
+    for col in from_cache:
+        _loaded[(csv_path, col)] = pl.read_parquet(_cache_file(col, csv_path, cache_dir)).to_series()
+
+    if from_csv:
+        df_csv = (
+            pl.scan_csv(
+                csv_path,
+                infer_schema=False,    # read all as strings, typing done in _encode
+                null_values='NA',
+            )
+            .select(from_csv)         # projection pushdown, other columns not parsed
+            .collect()
+        )
+        os.makedirs(cache_dir, exist_ok=True)
+        for s in df_csv:
+            s = _encode(s)
+            s.to_frame().write_parquet(_cache_file(s.name, csv_path, cache_dir))
+            _loaded[(csv_path, s.name)] = s
+
+    return pl.DataFrame([_loaded[(csv_path, col)] for col in columns])
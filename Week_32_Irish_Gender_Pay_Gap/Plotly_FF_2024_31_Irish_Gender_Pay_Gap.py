@@ -2,13 +2,37 @@ import polars as pl
 import polars.selectors as cs
 import plotly.express as px
 import numpy as np
+import os
 
 color_men = '#1FC3AA'
 color_women = '#8624F5'
 gender_color_dict = {'male' : color_men, 'female': color_women}
 
+gender_enum = pl.Enum(['Female', 'Male'])
+quartile_enum = pl.Enum(['Q1', 'Q2', 'Q3', 'Q4'])
 
-df = pl.read_csv('gpg.csv', ignore_errors = True)
+#  every reported measure is a number, 'NULL' means not reported
+gpg_measures = [
+    'meanBonus', 'meanHourly', 'medianBonus', 'medianHourly', 
+    'meanHourlyPT', 'medianHourlyPT', 'meanHourlyTemp', 'medianHourlyTemp',
+    'perBonusFemale', 'perBonusMale', 'perBIKFemale', 'perBIKMale',
+    'pb1Female', 'pb1Male', 'pb2Female', 'pb2Male', 
+    'pb3Female', 'pb3Male', 'pb4Female', 'pb4Male',
+    'perEmployeesFemale', 'perEmployeesMale'
+]
+
+def read_gpg(file='gpg.csv'):
+    ''' Read pay gap csv with nulls and numeric types set at parse time '''
+    return pl.read_csv(
+        file,
+        null_values='NULL',
+        schema_overrides={
+            'year': pl.UInt16,
+            **{c: pl.Float32 for c in gpg_measures}
+        },
+    )
+
+df = read_gpg()
 
 def add_annotation(fig, annotation, x, y, align, xanchor, yanchor, xref='paper', yref='paper', xshift=0):
     ''' Generic function to place text on plotly figures '''
@@ -22,40 +46,88 @@ def add_annotation(fig, annotation, x, y, align, xanchor, yanchor, xref='paper',
     )
     return fig
 
-def tweak_quantiles(df):
-    ''' Extract gender percentages of 4 salary quantiles  '''
-    return(
+def unpivot_by_gender(df, measures, value_name='Percent'):
+    '''
+    Unpivot the Female/Male column pairs of each measure prefix in list
+    measures (e.g. 'pb1', 'perBonus', 'perBIK', 'perEmployees') to long
+    format. One regex extract splits column names into MEASURE and Gender,
+    both Enums. Rows with nulls (not reported) are dropped.
+    '''
+    measure_enum = pl.Enum(measures)
+    return (
         df
-        .select(pl.col('pb1Female', 'pb1Male','pb2Female', 'pb2Male','pb3Female', 'pb3Male','pb4Female', 'pb4Male'))
         .unpivot(
+            on=[f'{m}{g}' for m in measures for g in gender_enum.categories],
+            index=['companyName', 'year'],
             variable_name='Cat',
-            value_name='Percent'
+            value_name=value_name
         )
-        .filter(pl.col('Percent') != 'NULL')
-        .with_columns(pl.col('Percent').cast(pl.Float32))
-        .with_columns(Gender = pl.col('Cat').str.slice(3))
+        .drop_nulls(value_name)
+        .with_columns(
+            pl.col('Cat')
+            .str.extract_groups(r'^(?<MEASURE>.+?)(?<Gender>Female|Male)$')
+            .struct.unnest()
+        )
+        .with_columns(
+            pl.col('MEASURE').cast(measure_enum),
+            pl.col('Gender').cast(gender_enum),
+        )
+    )
+
+def tweak_quantiles(df):
+    ''' Extract gender percentages of 4 salary quantiles  '''
+    return(
+        unpivot_by_gender(df, ['pb1', 'pb2', 'pb3', 'pb4'])
         .with_columns(
-            Enum_Quartile = (
-                pl.col('Cat')
-                .str.replace('pb1Male', 'Q1')
-                .str.replace('pb1Female', 'Q1')
-                .str.replace('pb2Male', 'Q2')
-                .str.replace('pb2Female', 'Q2')
-                .str.replace('pb3Male', 'Q3')
-                .str.replace('pb3Female', 'Q3')
-                .str.replace('pb4Male', 'Q4')
-                .str.replace('pb4Female', 'Q4')
-            )
+            Enum_Quartile = pl.col('MEASURE').to_physical()
+                .replace_strict(range(4), quartile_enum.categories, return_dtype=quartile_enum)
         )
         .group_by('Gender', 'Enum_Quartile').agg(pl.col('Percent').mean())
         .pivot(
             on = 'Gender',
             index='Enum_Quartile'
         )
-        .with_columns(Quartile = pl.col('Enum_Quartile').str.slice(1).cast(pl.UInt8))
+        .with_columns(Quartile = (pl.col('Enum_Quartile').to_physical() + 1).cast(pl.UInt8))
         .sort('Enum_Quartile', descending=False)
     )
 
+def yoy_changes(lf, measures=gpg_measures):
+    '''
+    Lazy query of year over year change per employer: for each measure, the
+    change (DELTA) and the percent change (PCT) from the employer's previous
+    reporting year. First reports and unreported measures give nulls.
+    '''
+    return (
+        lf
+        .select('companies_ID', 'companyName', 'year', *measures)
+        .sort('companies_ID', 'year')
+        .with_columns(
+            PREV_YEAR = pl.col('year').shift().over('companies_ID'),
+            **{f'{m}_DELTA': pl.col(m).diff().over('companies_ID') for m in measures},
+            **{f'{m}_PCT': 100 * pl.col(m).pct_change().over('companies_ID') for m in measures},
+        )
+        .filter(pl.col('PREV_YEAR').is_not_null())
+    )
+
+def yoy_percentiles(lf_changes, measures=gpg_measures, percentiles=(0.1, 0.25, 0.5, 0.75, 0.9)):
+    '''  percentiles of employer changes by reporting year, long format  '''
+    return (
+        lf_changes
+        .unpivot(
+            on=[f'{m}_DELTA' for m in measures],
+            index='year',
+            variable_name='MEASURE',
+            value_name='DELTA'
+        )
+        .with_columns(pl.col('MEASURE').str.strip_suffix('_DELTA').cast(pl.Enum(measures)))
+        .group_by('year', 'MEASURE')
+        .agg(
+            EMPLOYERS = pl.col('DELTA').count(),
+            **{f'P{int(100*q)}': pl.col('DELTA').quantile(q) for q in percentiles}
+        )
+        .sort('year', 'MEASURE')
+    )
+
 #------------------------------------------------------------------------------#
 #     Plot Gender proportion of 4 salary quantiles                             #
 #------------------------------------------------------------------------------#
@@ -123,3 +195,58 @@ annotation += f'50% more {m} than {w} in the highest income quartile<br>'
 fig = add_annotation(fig, annotation, 0.4, 0.5, 'left', 'left', 'middle')
 
 fig.show()
+
+#------------------------------------------------------------------------------#
+#     Year over year change by employer, computed lazily and cached as typed   #
+#     parquet (no csv round trip, no float to string conversions)              #
+#------------------------------------------------------------------------------#
+yoy_file = './cache/gpg_yoy_changes.parquet'
+if os.path.exists(yoy_file) and os.path.getmtime(yoy_file) >= os.path.getmtime('gpg.csv'):
+    df_yoy = pl.read_parquet(yoy_file)
+else:
+    df_yoy = yoy_changes(df.lazy()).collect()
+    os.makedirs(os.path.dirname(yoy_file), exist_ok=True)
+    df_yoy.write_parquet(yoy_file)
+
+df_yoy_pctl = (
+    yoy_percentiles(
+        df_yoy.lazy(), 
+        ['meanHourly', 'medianHourly', 'meanBonus', 'medianBonus', 'perBonusFemale', 'perBonusMale']
+    )
+    .collect()
+)
+print(df_yoy_pctl)
+
+fig = px.scatter(
+    df_yoy_pctl,
+    x='MEASURE',
+    y='P50',
+    error_y=(df_yoy_pctl['P75'] - df_yoy_pctl['P50']).to_list(),
+    error_y_minus=(df_yoy_pctl['P50'] - df_yoy_pctl['P25']).to_list(),
+    facet_col='year',
+    custom_data=['P25', 'P50', 'P75', 'EMPLOYERS'],
+)
+fig.update_traces(
+    marker=dict(size=12, color='darkslategray'),
+    hovertemplate = '<br>'.join([
+        'Median change: %{customdata[1]:.1f}',
+        '25th to 75th percentile: %{customdata[0]:.1f} to %{customdata[2]:.1f}',
+        '%{customdata[3]} employers',
+        '<extra></extra>'
+    ])
+)
+fig.update_layout(
+    title = 'Irish Gender Gap, change from previous report by employer',
+    height=600, width=800,
+    xaxis_title='',
+    yaxis_title='change (percentage points), median & IQR'.upper(),
+    yaxis_title_font=dict(size=14),
+    margin={"r":50, "t":80, "l":50, "b":50},
+    autosize=False,
+    showlegend=False,
+    template='plotly_white',
+)
+fig.add_hline(y=0, line_width=1, line_dash='dot', line_color='gray')
+fig.update_xaxes(showgrid=False)
+fig.update_yaxes(showgrid=False)
+fig.show()
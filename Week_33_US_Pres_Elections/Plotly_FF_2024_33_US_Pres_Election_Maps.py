@@ -155,45 +155,44 @@ customdata=np.stack(
     )
 
 #------------------------------------------------------------------------------#
-#     make map of each election year                                           #
+#     make one map with a frame for each election year. State outlines come    #
+#     from plotly's built-in USA-states locations, no geojson download, and    #
+#     layout, color axis and geometry are shared by all frames                 #
 #------------------------------------------------------------------------------#
-for year in sorted(final_df['year'].unique()):
-    print('\n\n\n\n\n                                                  ', year)
-    year_df = final_df.filter(pl.col('year') == year)
-    fig = px.choropleth(
-        year_df,
-        geojson="https://raw.githubusercontent.com/plotly/datasets/master/geojson-counties-fips.json",
-        locationmode='USA-states',
-        locations='state_po',
-        color='DIFF_PCT',
-        scope="usa",
-        color_continuous_scale=px.colors.diverging.RdBu,
-        color_continuous_midpoint=0,
-        range_color=[-0.35,0.35],
-        animation_frame='year',
-        custom_data=[
-            'state', 'year', 
-            'STATE_WINNER', 'WINNING_PARTY',
-            'STATE_LOSER', 'LOSING_PARTY', 
-            'WINNING_PCT', 'LOSING_PCT',
-            'ABS_DIFF_PCT'
-        ],
-        title = str(year)
-    )
+fig = px.choropleth(
+    final_df.sort('year', 'state_po'),
+    locationmode='USA-states',
+    locations='state_po',
+    color='DIFF_PCT',
+    scope="usa",
+    color_continuous_scale=px.colors.diverging.RdBu,
+    color_continuous_midpoint=0,
+    range_color=[-0.35,0.35],
+    animation_frame='year',
+    custom_data=[
+        'state', 'year', 
+        'STATE_WINNER', 'WINNING_PARTY',
+        'STATE_LOSER', 'LOSING_PARTY', 
+        'WINNING_PCT', 'LOSING_PCT',
+        'ABS_DIFF_PCT'
+    ],
+)
 #------------------------------------------------------------------------------#
-#     Update trace with hovertemplate                                          #
+#     Update traces of every frame with hovertemplate                          #
 #------------------------------------------------------------------------------#
-    fig.update_traces(
-        hovertemplate =
-            '%{customdata[0]}: %{customdata[1]}<br>' +
-            '%{customdata[2]}-%{customdata[3]} def. %{customdata[4]}-%{customdata[5]}<br>' +
-            '%{customdata[6]:.1%} to %{customdata[7]:.1%}<br>' +
-            'Margin: %{customdata[8]:.1%}<br>' +
-            '<extra></extra>'
+hovertemplate = (
+    '%{customdata[0]}: %{customdata[1]}<br>' +
+    '%{customdata[2]}-%{customdata[3]} def. %{customdata[4]}-%{customdata[5]}<br>' +
+    '%{customdata[6]:.1%} to %{customdata[7]:.1%}<br>' +
+    'Margin: %{customdata[8]:.1%}<br>' +
+    '<extra></extra>'
+)
+fig.update_traces(hovertemplate=hovertemplate)
+for frame in fig.frames:
+    frame.data[0].hovertemplate = hovertemplate
+fig.update_layout(
+    margin={"r":0, "t":0, "l":0, "b":0},
     )
-    fig.update_layout(
-        margin={"r":0, "t":0, "l":0, "b":0},
-        )
-    
-    # fig.write_html(f'{str(year)}_Pres_Election_State_Res_Map.html')
-    fig.show()
\ No newline at end of file
+
+# fig.write_html('Pres_Election_State_Res_Map.html')
+fig.show()
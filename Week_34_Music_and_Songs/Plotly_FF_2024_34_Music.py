@@ -12,18 +12,37 @@ df = pl.read_csv(
 #------------------------------------------------------------------------------#
 #     Find the top 10 of each genre - ranking based on popularity              #
 #------------------------------------------------------------------------------#
+def top_k_by_group(lf, group, by, k=10):
+    '''
+    Return the k highest rows of column `by` within each `group`, as a long
+    frame sorted by group and descending `by`, with a 1-based rank column.
+    top_k_by is a partial selection per group, so the full dataset is never
+    sorted, only the k survivors of each group.
+    '''
+    return (
+        lf
+        .group_by(group)
+        .agg(
+            GROUP_COUNT = pl.len(),
+            TOP_K = pl.struct(pl.all()).top_k_by(by, k=k),
+        )
+        .explode('TOP_K')
+        .unnest('TOP_K')
+        .sort([group, by], descending=True)
+        .with_columns(RANK = pl.int_range(1, pl.len() + 1).over(group))
+    )
+
 top_10_by_genre = (
-    pl.LazyFrame(
-        df
+    top_k_by_group(
+        df.lazy()
         .select(pl.col('track_genre', 'artists', 'track_name', 'popularity'))
         .with_columns(ARTIST_COUNT = pl.col('artists').count().over('artists'))
-        .unique(['track_genre', 'artists'])
-        .group_by(['track_genre', 'artists', 'track_name', 'ARTIST_COUNT']).agg(pl.mean('popularity'))
-        .sort(['track_genre','popularity'], descending=True)
-        .with_columns(GENRE_COUNT = pl.col('track_genre').count().over('track_genre'))
-        .with_columns(TRACK_GENRE_RANK = pl.col('track_genre').cum_count().over('track_genre'))
-        .filter(pl.col('TRACK_GENRE_RANK') <= 10)
+        .unique(['track_genre', 'artists']),
+        group='track_genre',
+        by='popularity',
+        k=10,
     )
+    .rename({'GROUP_COUNT': 'GENRE_COUNT', 'RANK': 'TRACK_GENRE_RANK'})
     .collect()
 )
 
@@ -33,8 +52,8 @@ top_10_by_genre = (
 top_10_genres = (
     top_10_by_genre
     .group_by(pl.col('track_genre')).agg(pl.mean('popularity'))
+    .top_k(10, by='popularity')
     .sort('popularity', descending=True)
-    .head(10)
     .select(pl.col('track_genre'))
     .to_series()
     .to_list()
@@ -43,39 +62,34 @@ top_10_genres = (
 #------------------------------------------------------------------------------#
 #      Make bar charts of top 10 songs in the top 10 genres                    #
 #------------------------------------------------------------------------------#
-for genre in top_10_genres:  # iterate through the top 10 genres
-    df_plot = (
-        pl.LazyFrame(
-            top_10_by_genre
-            .filter(pl.col('track_genre') == genre)
-            .select(pl.col('artists', 'track_name', 'popularity','track_genre', 'ARTIST_COUNT'))
-            .with_columns(
-                pl.col('artists').str.to_titlecase(),
-            )
-            .with_columns(
-                ARTIST_TOTAL = pl.col('artists').count().over('artists')
-            )
-            .with_row_index(offset=1)
-            .tail(10)
-            .with_columns(
-                ARTIST_TRACK =  (
-                    pl.lit('<b>') +            #  bold font for artist name
-                    pl.col('artists') + 
-                    pl.lit('</b>') +           #  end bold font, use normal fon for track name
-                    pl.lit('     ') +          #  add spaces after artist name to separate from plot
-                    pl.lit('<br>') +           #  html line feed puts artist name on first line,track name on second
-                    pl.col('track_name')  +  
-                    pl.lit('     ')            #  add spaces after track name to separate from plot
-                    )
+# one pass over the top 10 genres, then split into a frame per genre
+df_genre_plots = (
+    top_10_by_genre
+    .filter(pl.col('track_genre').is_in(top_10_genres))
+    .select(pl.col('artists', 'track_name', 'popularity','track_genre', 'ARTIST_COUNT'))
+    .with_columns(
+        pl.col('artists').str.to_titlecase(),
+    )
+    .with_columns(
+        ARTIST_TOTAL = pl.col('artists').count().over('track_genre', 'artists'),
+        ARTIST_TRACK =  (
+            pl.lit('<b>') +            #  bold font for artist name
+            pl.col('artists') + 
+            pl.lit('</b>') +           #  end bold font, use normal fon for track name
+            pl.lit('     ') +          #  add spaces after artist name to separate from plot
+            pl.lit('<br>') +           #  html line feed puts artist name on first line,track name on second
+            pl.col('track_name')  +  
+            pl.lit('     ')            #  add spaces after track name to separate from plot
             )
-            .sort('popularity')
-        )
-        .collect()
     )
+    .sort(['track_genre', 'popularity'])
+    .partition_by('track_genre', as_dict=True, include_key=True)
+)
 
-    #  Make horizontal bar chart
+def make_genre_bar(genre):
+    '''  horizontal bar chart of the top 10 songs of one genre '''
     fig = px.bar(
-        df_plot.sort('popularity', descending=False), 
+        df_genre_plots[(genre,)], 
         x='popularity',
         y="ARTIST_TRACK",
         orientation = 'h',
@@ -85,6 +99,11 @@ for genre in top_10_genres:  # iterate through the top 10 genres
         range_x=[80, 100],
         )
     fig.update_layout(title = genre)
+    return fig
+
+# figures are shown in order of genre popularity
+genre_figs = [make_genre_bar(genre) for genre in top_10_genres]
+for fig in genre_figs:
     fig.show()
 
     #Focus on most popular track by artist
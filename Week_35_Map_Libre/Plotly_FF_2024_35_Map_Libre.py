@@ -1,6 +1,8 @@
 import polars as pl
 import plotly.express as px
+import plotly.graph_objects as go
 import plotly.io as pio
+from map_clusters import cached_clusters
 # included next line if using jupyter notebook, commented out if running python
 # pio.renderers.default = "notebook_connected"
 
@@ -9,6 +11,10 @@ import plotly.io as pio
 import us
 state_list = [s for s in us.states.mapping('abbr', 'name').values()]
 
+DETAIL_ZOOM = 7       # individual points shown at this map zoom and closer
+CLUSTER_ZOOMS = list(range(DETAIL_ZOOM))   # grid clusters shown when zoomed out
+INITIAL_ZOOM = 3
+
 
 def wrap_hover(text, chars_per_line=28):
     '''
@@ -100,7 +106,7 @@ fig = px.scatter_map(
     color='color_size',
     color_continuous_scale='Magenta_r',
     size_max=35,
-    zoom=3,
+    zoom=INITIAL_ZOOM,
     map_style='streets',
     custom_data=[
         'name_clean',              #  customdata[0]
@@ -141,6 +147,52 @@ fig.update_traces(
         '<extra></extra>'
 )
 
+#------------------------------------------------------------------------------#
+#     Add one trace of grid clusters per zoom level, see map_clusters.py. Only #
+#     the trace for the current zoom is visible, the individual points are     #
+#     hidden until zoomed in to DETAIL_ZOOM. Trace meta holds its zoom level   #
+#------------------------------------------------------------------------------#
+df_clusters = cached_clusters(data_set, CLUSTER_ZOOMS)
+min_log_views = data_set['views_sum'].log10().min()
+fig.update_traces(meta=DETAIL_ZOOM, visible=INITIAL_ZOOM >= DETAIL_ZOOM)
+for (zoom,), df_zoom in df_clusters.partition_by('ZOOM', as_dict=True).items():
+    fig.add_trace(
+        go.Scattermap(
+            lat=df_zoom['lat'],
+            lon=df_zoom['lng'],
+            mode='markers+text',
+            text=df_zoom['COUNT'].cast(pl.String),
+            textfont=dict(size=11, color='black'),
+            marker=dict(
+                size=(12 + 28 * (df_zoom['COUNT'] / df_zoom['COUNT'].max()).sqrt()).round(1),
+                color=(1 + df_zoom['TOP_WEIGHT'].log10() - min_log_views).pow(2).round(1),
+                coloraxis='coloraxis',
+                opacity=0.8,
+            ),
+            customdata=df_zoom.select('COUNT', 'views_sum', 'TOP_LABEL'),
+            hovertemplate=
+                '<b>%{customdata[0]:,} people</b><br>' +
+                '<b>Total Views:</b>%{customdata[1]:>20,}<br>' +
+                '<b>Most viewed: </b>%{customdata[2]}<br>' +
+                '<extra></extra>',
+            meta=zoom,
+            visible=bool(zoom == min(INITIAL_ZOOM, DETAIL_ZOOM)),
+            showlegend=False,
+        )
+    )
+
+# switch visible traces when the zoom level changes, runs in the html page
+toggle_by_zoom = '''
+var gd = document.getElementById('{plot_id}');
+var shown = null;
+gd.on('plotly_relayout', function() {
+    var level = Math.min(Math.max(Math.floor(gd.layout.map.zoom), 0), %d);
+    if (level === shown) { return; }
+    shown = level;
+    Plotly.restyle(gd, {visible: gd.data.map(function(t) { return t.meta === level; })});
+});
+''' % DETAIL_ZOOM
+
 fig.update_layout(
     hoverlabel=dict(
         bgcolor="white",
@@ -153,8 +205,8 @@ fig.update_layout(
     margin={"r":0, "t":0, "l":0, "b":0},
     )
 
-fig.write_html(f'Fig_Fri_Week_35_Map.html')
-fig.show()
+fig.write_html(f'Fig_Fri_Week_35_Map.html', post_script=toggle_by_zoom)
+fig.show(post_script=toggle_by_zoom)
 
 #------------------------------------------------------------------------------#
 #     For Data Exploration, histogram of views_sum                             #
@@ -0,0 +1,89 @@
+import hashlib
+import json
+import os
+import numpy as np
+import polars as pl
+
+#------------------------------------------------------------------------------#
+#     Grid clusters of map points, precomputed for each zoom level             #
+#------------------------------------------------------------------------------#
+# Points are projected to Web Mercator pixel coordinates of a MapLibre map
+# (512 px tiles). At zoom z the world is 512 * 2**z pixels wide, and points
+# falling in the same square of radius x radius pixels form one cluster,
+# drawn as a single bubble at the mean position of its points. Each zoom
+# level doubles the pixel coordinates, so every cell splits into exactly 4
+# cells at the next level: the clusters form a hierarchy like supercluster's,
+# and CLUSTER_ID of level z is PARENT_ID of its children at level z + 1.
+#
+# Clusters for all levels are built in one query and cached as parquet in
+# ./cache. The cache file name holds a hash of the input rows and of the
+# parameters, so a different filter, zooms, radius or weight/label columns
+# build a new file instead of reading stale clusters.
+
+TILE_SIZE = 512
+CACHE_DIR = './cache'
+
+
+def mercator_pixels(lat, lng, zoom):
+    '''  Web Mercator world pixel x, y expressions at zoom, for lat and lng columns '''
+    world = TILE_SIZE * 2 ** zoom
+    sin_lat = pl.col(lat).radians().sin().clip(-0.9999, 0.9999)
+    return (
+        (pl.col(lng) + 180) / 360 * world,
+        (0.5 - ((1 + sin_lat) / (1 - sin_lat)).log() / (4 * np.pi)) * world,
+    )
+
+
+def grid_clusters(df, zooms, radius=60, lat='lat', lng='lng', weight='views_sum', label='name_clean'):
+    '''
+    Return clusters of df at each zoom level in zooms, with columns ZOOM,
+    CLUSTER_ID, PARENT_ID, lat, lng (mean of the points), COUNT, the summed
+    weight column and TOP_LABEL / TOP_WEIGHT of the point with the largest
+    weight, sorted by ZOOM and descending weight.
+    '''
+    frames = []
+    for zoom in zooms:
+        x, y = mercator_pixels(lat, lng, zoom)
+        cell_x, cell_y = (x / radius).floor().cast(pl.Int64), (y / radius).floor().cast(pl.Int64)
+        frames.append(
+            df.lazy()
+            .select(
+                pl.col(lat, lng, weight, label),
+                ZOOM = pl.lit(zoom, dtype=pl.UInt8),
+                CLUSTER_ID = pl.format('{}/{}/{}', pl.lit(zoom), cell_x, cell_y),
+                PARENT_ID = pl.format('{}/{}/{}', pl.lit(zoom - 1), cell_x // 2, cell_y // 2)
+                    if zoom > min(zooms) else pl.lit(None, dtype=pl.String),
+            )
+            .group_by('ZOOM', 'CLUSTER_ID', 'PARENT_ID')
+            .agg(
+                pl.col(lat, lng).mean(),
+                COUNT = pl.len(),
+                TOP_LABEL = pl.col(label).sort_by(weight).last(),
+                TOP_WEIGHT = pl.col(weight).max(),
+                **{weight: pl.col(weight).cast(pl.Float64).sum()},   # no int32 overflow
+            )
+        )
+    return (
+        pl.concat(pl.collect_all(frames))
+        .sort('ZOOM', weight, descending=[False, True])
+    )
+
+
+def cached_clusters(
+        df, zooms, radius=60, lat='lat', lng='lng', weight='views_sum', label='name_clean',
+        cache_dir=CACHE_DIR,
+    ):
+    '''
+    grid_clusters of df, read from the parquet cache when one was built from
+    the same rows of the used columns with the same parameters.
+    '''
+    columns = [lat, lng, weight, label]
+    digest = hashlib.sha1(json.dumps([sorted(zooms), radius, columns]).encode())
+    digest.update(df.select(columns).hash_rows(seed=0).to_numpy().tobytes())
+    cache_file = os.path.join(cache_dir, f'people_map_clusters_{digest.hexdigest()[:12]}.parquet')
+    if os.path.exists(cache_file):
+        return pl.read_parquet(cache_file)
+    df_clusters = grid_clusters(df, zooms, radius, lat, lng, weight, label)
+    os.makedirs(cache_dir, exist_ok=True)
+    df_clusters.write_parquet(cache_file)
+    return df_clusters
@@ -87,6 +87,51 @@ def add_annotation(ig, annotation, align, xanchor, yanchor, x, xref, y, yref,
     )
     return fig
 
+def add_color_bands(fig, df, x_col, bin_col, color_dict, width=1):
+    '''
+    Shade a vertical band of given width behind each x value, colored by
+    bin_col using color_dict. Consecutive x values with the same color, and
+    no gap wider than width between them, are merged into one rectangle. The
+    bands are appended to the shapes already on fig in a single update
+    instead of one add_vrect call per row.
+    '''
+    df_bands = (
+        df.lazy()
+        .sort(x_col)
+        .select(
+            pl.col(x_col),
+            COLOR = pl.col(bin_col).replace_strict(color_dict, default=None),
+        )
+        .with_columns(
+            # new run when the color changes or x skips values
+            RUN = (
+                pl.col('COLOR').ne_missing(pl.col('COLOR').shift()) |
+                (pl.col(x_col).diff() > width).fill_null(False)
+            ).cum_sum()
+        )
+        .group_by('RUN', maintain_order=True)
+        .agg(
+            pl.col('COLOR').first(),
+            X0 = pl.col(x_col).min() - width/2,
+            X1 = pl.col(x_col).max() + width/2,
+        )
+        .filter(pl.col('COLOR').is_not_null())   # bins without color stay blank
+        .collect()
+    )
+    fig.update_layout(
+        shapes=list(fig.layout.shapes) + [
+            dict(
+                type='rect',
+                xref='x', x0=x0, x1=x1,
+                yref='y domain', y0=0, y1=1,
+                fillcolor=color, line_color=color,
+                layer='below',
+            )
+            for x0, x1, color in df_bands.select('X0', 'X1', 'COLOR').iter_rows()
+        ]
+    )
+    return fig
+
 #------------------------------------------------------------------------------#
 #     setup px.scatter                                                         #
 #------------------------------------------------------------------------------#
@@ -238,15 +283,7 @@ fig.update_traces(
 #------------------------------------------------------------------------------#
 #     add a box of width 1 above each year, use color_dict for shading value   #
 #------------------------------------------------------------------------------#
-for year in df_pollution['Year'].to_list():
-    my_bin = df_pollution.filter(pl.col('Year') == year).select(pl.col('BIN')).to_series()[0]
-    my_color = my_color_dict.get(my_bin)
-    fig.add_vrect(
-        x0=year-0.5, x1=year+0.5,
-        fillcolor=my_color, #  opacity=0.5,
-        layer="below", 
-        line_color=my_color,
-    )
+fig = add_color_bands(fig, df_pollution, 'Year', 'BIN', my_color_dict)
 
 fig.data = fig.data[::-1]
 fig.update_xaxes(showgrid=False)
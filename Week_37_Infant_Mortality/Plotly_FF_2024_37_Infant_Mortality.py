@@ -1,26 +1,35 @@
 import polars as pl
 import plotly.express as px
 
+rate = 'Under-five mortality rate'
+window = 10   # years in rolling mean
+countries = ['India', 'Brazil', 'United States', 'France', 'United Kingdom', 'Sweden']
+
+#------------------------------------------------------------------------------#
+#     Rolling mean of every entity in long format. Entities cover different    #
+#     years with gaps, so the window is 10 calendar years (not 10 rows), and   #
+#     a mean needs a value for each of the 10 years                           #
+#------------------------------------------------------------------------------#
 df = (
-    pl.read_csv('child-mortality.csv')
-    .filter(
-        pl.col('Entity')
-        .is_in(['India', 'Brazil', 'United States', 'France', 'United Kingdom', 'Sweden'])
-    )
-    .select(pl.all().exclude('Code'))
-    .pivot(
-        index= 'Year',
-        on='Entity'
+    pl.scan_csv('child-mortality.csv')
+    .with_columns(
+        # countries have ISO codes, regions/income groups have none, World is OWID_WRL
+        IS_COUNTRY = pl.col('Code').is_not_null() & (pl.col('Code') != 'OWID_WRL')
     )
-    .sort('Year')
+    .sort('Entity', 'Year')
     .with_columns(
-        pl.all().exclude('Year').rolling_mean(window_size=10),
+        ROLLING_MEAN = pl.col(rate)
+            .rolling_mean_by('Year', window_size=f'{window}i', min_samples=window)
+            .over('Entity')
     )
+    .collect()
 )
+
 fig = px.scatter(
-    df,
+    df.filter(pl.col('Entity').is_in(countries)),
     'Year',
-    df.columns[1:]
+    'ROLLING_MEAN',
+    color='Entity',
 )
 my_title = 'Child Mortality Rate, 1751 to 2021<br>'
 my_title += '<sup>The Estimated Share of newborns<sup>1</sub> who die before reaching the age of five</sup>'
@@ -46,4 +55,35 @@ fig.update_traces(
 
 fig.update_xaxes(showgrid=False)
 fig.update_yaxes(showgrid=False)
-fig.show()
\ No newline at end of file
+fig.show()
+
+#------------------------------------------------------------------------------#
+#     Small multiples, one panel per country, all from the same dataframe      #
+#------------------------------------------------------------------------------#
+cols = 12
+df_countries = df.filter(pl.col('IS_COUNTRY'), pl.col('ROLLING_MEAN').is_not_null())
+n_rows = -(-df_countries['Entity'].n_unique() // cols)    # ceiling division
+fig = px.line(
+    df_countries,
+    'Year',
+    'ROLLING_MEAN',
+    facet_col='Entity',
+    facet_col_wrap=cols,
+    facet_row_spacing=0.4/n_rows,
+    facet_col_spacing=0.01,
+    template='plotly_white',
+    height=90*n_rows, width=1400,
+    title=(
+        f'Child Mortality Rate, {window} year rolling mean, all countries<br>' +
+        '<sup>Share of newborns who die before reaching the age of five, ' +
+        'Data source: UN IGME (2023); Gapminder(2015)</sup>'
+    ),
+)
+fig.for_each_annotation(
+    lambda a: a.update(text=a.text.replace('Entity=', ''), font_size=9)
+)
+fig.update_traces(line_width=1, hovertemplate='%{x}: %{y:.1f}%<extra></extra>')
+fig.update_xaxes(title='', showgrid=False, showticklabels=False)
+fig.update_yaxes(title='', showgrid=False, showticklabels=False)
+fig.write_html('Child_Mortality_Small_Multiples.html')
+fig.show()
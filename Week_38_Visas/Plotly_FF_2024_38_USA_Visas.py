@@ -5,6 +5,7 @@ from plotly.subplots import make_subplots
 import plotly.graph_objects as go
 import numpy as np
 import us
+from wide_tables import transpose_table
 pl.show_versions()
 #------------------------------------------------------------------------------#
 #     with us library, make dataframe of state abbreviations and names         #
@@ -12,9 +13,11 @@ pl.show_versions()
 df_state_names = (
     pl.concat(  # use concat to add a row for Washington DC
         [
-            pl.DataFrame(us.states.mapping('abbr', 'name'))
-            .transpose(include_header=True)
-            .rename({'column': 'STATE_ABBR', 'column_0': 'STATE'})
+            pl.DataFrame(
+                list(us.states.mapping('abbr', 'name').items()),
+                schema=['STATE_ABBR', 'STATE'],
+                orient='row',
+            )
             ,
             pl.DataFrame(
                 {
@@ -236,8 +239,7 @@ df_by_state = (
     .rename({'PER_M_2021' : '2021', 'PER_M_2022': '2022', 'PER_M_2023': '2023', 'PER_M_2024': '2024' })
     .sort('STATE')
     .drop('STATE')
-    .transpose(include_header=True,column_names='STATE_ABBR',header_name='YEAR')
-    .with_columns(pl.col('YEAR').cast(pl.UInt16))
+    .pipe(transpose_table, index='STATE_ABBR', header_name='YEAR', header_dtype=pl.UInt16)
 )
 
 #------------------------------------------------------------------------------#
@@ -0,0 +1,103 @@
+import resource
+import time
+import numpy as np
+import polars as pl
+
+#------------------------------------------------------------------------------#
+#     Reshape wide tables without DataFrame.transpose                          #
+#------------------------------------------------------------------------------#
+# Tables with one column per year or one column per entity (state, country)
+# are reshaped here by unpivot/pivot, which keep the dtype of the value
+# columns. DataFrame.transpose(include_header=True) puts the header names and
+# the values in the same columns, so any table with a text column comes back
+# as all strings and has to be cast again.
+#
+# When all value columns share one numeric dtype and hold no nulls,
+# transpose_table skips the long intermediate table: the values are exported
+# to a 2-D numpy array and copied once to row-major order, and each row
+# becomes an output column. numpy has no null, to_numpy turns nulls into NaN
+# (and integer columns into floats), so tables with gaps take unpivot/pivot.
+# Run this file to check dtypes and nulls are kept, and to print a memory and
+# time report for a wide benchmark table.
+
+def wide_to_long(df, index, variable_name, value_name, variable_dtype=pl.String):
+    '''
+    Unpivot every column not in list index into rows, with the column name
+    in variable_name (cast to variable_dtype, e.g. pl.UInt16 for years) and
+    the value in value_name.
+    '''
+    return (
+        df
+        .unpivot(index=index, variable_name=variable_name, value_name=value_name)
+        .with_columns(pl.col(variable_name).cast(variable_dtype))
+    )
+
+
+def transpose_table(df, index, header_name, header_dtype=pl.String):
+    '''
+    Return typed transpose of df: the values of column index become the column
+    names, and the names of the other columns become rows, in a first column
+    header_name cast to header_dtype. Value dtypes are kept (mixed value
+    dtypes are combined to their supertype).
+    '''
+    value_cols = [col for col in df.columns if col != index]
+    names = df[index].cast(pl.String).to_list()
+    headers = pl.Series(header_name, value_cols).cast(header_dtype)
+    schema = df.schema      # built on every access, look it up once
+    dtypes = {schema[col] for col in value_cols}
+
+    numeric_path = (
+        len(dtypes) == 1 and next(iter(dtypes)).is_numeric() and
+        df.select(value_cols).null_count().sum_horizontal().item() == 0
+    )
+    if numeric_path:
+        # row major copy, so each input row is one contiguous output column
+        values = np.ascontiguousarray(df.select(value_cols).to_numpy())
+        return pl.DataFrame(
+            [headers] + [pl.Series(name, row) for name, row in zip(names, values)]
+        )
+    return (
+        df
+        .unpivot(index=index, variable_name=header_name)
+        .pivot(on=index, index=header_name, values='value')
+        .with_columns(pl.col(header_name).cast(header_dtype))
+    )
+
+
+def _peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024   # kB on linux
+
+
+def benchmark(n_rows=10_000, n_cols=10_000):
+    '''  print memory and time used to transpose an n_rows x n_cols Float32 table '''
+    rng = np.random.default_rng(0)
+    df = (
+        pl.from_numpy(
+            rng.random((n_rows, n_cols), dtype=np.float32),
+            schema=[str(year) for year in range(n_cols)],
+        )
+        .insert_column(0, pl.Series('ENTITY', [f'E{i}' for i in range(n_rows)]))
+    )
+    print(f'input     {n_rows:,} x {n_cols:,}  {df.estimated_size("mb"):8,.0f} MB')
+    rss_before = _peak_rss_mb()
+    start = time.perf_counter()
+    df_t = transpose_table(df, 'ENTITY', 'YEAR', header_dtype=pl.UInt16)
+    seconds = time.perf_counter() - start
+    print(f'output    {df_t.height:,} x {df_t.width:,}  {df_t.estimated_size("mb"):8,.0f} MB')
+    print(f'peak RSS growth {_peak_rss_mb() - rss_before:8,.0f} MB in {seconds:.2f} s')
+    print(f'dtypes    {set(df_t.schema.values())}')
+
+
+def check_transpose():
+    '''  assert transpose_table keeps dtypes and nulls, with and without gaps '''
+    for values in ([1, 2], [1, None]):
+        df = pl.DataFrame({'S': ['a', 'b'], '2021': values, '2022': [3, 4]})
+        df_t = transpose_table(df, 'S', 'YEAR', header_dtype=pl.UInt16)
+        assert df_t.schema == {'YEAR': pl.UInt16, 'a': pl.Int64, 'b': pl.Int64}, df_t.schema
+        assert df_t['b'].to_list() == [values[1], 4], df_t
+    print('transpose_table keeps dtypes and nulls')
+
+
+if __name__ == '__main__':
+    check_transpose()
+    benchmark()
@@ -1,51 +1,39 @@
 import polars as pl
 import plotly.express as px
 import plotly.graph_objects as go
+from diversity import aggregate, bray_curtis, count_tensor, diversity_frame
+from jornada import quadrat_decade_abundance, scan_plants
 #------------------------------------------------------------------------------#
-#     Read 2 datasets as polars LazyFrames, join on species_code               #
-#------------------------------------------------------------------------------#
-df_all = (
-    (
-        pl.scan_csv('./Data_Set/Jornada_quadrat_species_list.csv')
-        .collect()
-    ).join(
-        (
-        pl.scan_csv('./Data_Set/Jornada_quadrat_annual_plant_counts.csv')
-        .collect()
-        ),
-        on='species_code'
-    )
-)
+#     Lazy join of plant counts with species list, see jornada.py              #
+#------------------------------------------------------------------------------#
+lf_plants = scan_plants()
 
 #------------------------------------------------------------------------------#
-#     collect each lazyframes, join on the species code                        #
-#     add columns for decade, decade based genus count and percentage          #
+#     group by integer decade and Enum genus, add genus percentage by decade.  #
+#     Decades without plants of a genus are 0%, unknown genera are left out    #
 #------------------------------------------------------------------------------#
+lf_genus = lf_plants.filter(pl.col('genus').is_not_null())
 df_by_decade = (
-    df_all
-    .with_columns(
-        decade = (pl.col('year')//10).cast(pl.String) + pl.lit('0s')
-    )
-    .group_by('decade', 'genus', 'species_code', 'species','common_name')
-    .agg(pl.col('count').sum())
-    .with_columns(GENUS_COUNT = pl.col('count').sum().over('genus'))
-    .with_columns(GENUS_PCT = (pl.col('count') / pl.col('GENUS_COUNT')))
-    .sort('decade', 'count')
-    .pivot(
-        on='genus',
-        index='decade',
-        values='GENUS_PCT',
-        aggregate_function="sum"
+    lf_genus.select('DECADE').unique()
+    .join(lf_genus.select('genus').unique(), how='cross')
+    .join(
+        lf_genus.group_by('DECADE', 'genus').agg(pl.col('count').sum()),
+        on=['DECADE', 'genus'],
+        how='left',
     )
+    .with_columns(pl.col('count').fill_null(0))
+    .with_columns(GENUS_PCT = pl.col('count') / pl.col('count').sum().over('genus'))
+    .sort('genus', 'DECADE')
+    .collect(engine='streaming')
 )
 #------------------------------------------------------------------------------#
 #     make px.line plot of of genus percentages by decade                      #
 #------------------------------------------------------------------------------#
-plot_cols = df_by_decade.columns[1:]
 fig = px.line(
     df_by_decade,
-    'decade',
-    plot_cols,
+    'DECADE',
+    'GENUS_PCT',
+    color='genus',
 )
 
 #------------------------------------------------------------------------------#
@@ -77,7 +65,7 @@ fig.update_layout(
     )
 )
 fig.layout.template = 'plotly_white' 
-fig.update_xaxes(showgrid=False)
+fig.update_xaxes(showgrid=False, ticksuffix='s', tickformat='d')
 fig.update_yaxes(showgrid=False,tickformat = '.0%')
 
 #------------------------------------------------------------------------------#
@@ -100,3 +88,70 @@ fig.add_annotation(
 )
 
 fig.show()
+
+#------------------------------------------------------------------------------#
+#     Quadrat level: plants counted per year, by quadrat and decade            #
+#------------------------------------------------------------------------------#
+df_quadrat_decade = (
+    quadrat_decade_abundance(lf_plants)
+    .group_by('quadrat', 'DECADE')
+    .agg(PLANTS_PER_YEAR = pl.col('COUNT').sum() / pl.col('YEARS_COUNTED').first())
+    .sort('quadrat', 'DECADE')
+)
+df_heatmap = (
+    df_quadrat_decade
+    .pivot(on='DECADE', index='quadrat', values='PLANTS_PER_YEAR', sort_columns=True)
+)
+fig = px.imshow(
+    df_heatmap.drop('quadrat').to_numpy(),
+    x=[f'{d}s' for d in df_heatmap.columns[1:]],
+    y=df_heatmap['quadrat'].to_list(),
+    color_continuous_scale='Greens',
+    aspect='auto',
+    template='plotly_white',
+    width=800, height=1400,
+    title='Jornada plants counted per year, by quadrat and decade'.upper(),
+)
+fig.update_xaxes(title='decade'.upper(), side='top')
+fig.update_yaxes(title='quadrat'.upper())
+fig.update_layout(coloraxis_colorbar_title='PLANTS<br>PER YEAR')
+fig.show()
+
+#------------------------------------------------------------------------------#
+#     Diversity by decade from the sparse sample x species count matrix        #
+#------------------------------------------------------------------------------#
+df_samples, species, counts = count_tensor(lf_plants)
+df_decades, decade_counts = aggregate(df_samples, counts, ['DECADE'])
+df_diversity = diversity_frame(df_decades, decade_counts)
+
+fig = px.line(
+    df_diversity.unpivot(index='DECADE', variable_name='INDEX', value_name='VALUE'),
+    'DECADE',
+    'VALUE',
+    facet_row='INDEX',
+    markers=True,
+    template='plotly_white',
+    width=800, height=700,
+    title='Jornada species diversity by decade'.upper(),
+)
+fig.update_yaxes(matches=None, title='')
+fig.update_xaxes(showgrid=False, ticksuffix='s', tickformat='d')
+fig.for_each_annotation(lambda a: a.update(text=a.text.replace('INDEX=', '')))
+fig.show()
+
+#------------------------------------------------------------------------------#
+#     Bray-Curtis dissimilarity of species counts between decades              #
+#------------------------------------------------------------------------------#
+decade_labels = [f'{d}s' for d in df_decades['DECADE']]
+fig = px.imshow(
+    bray_curtis(decade_counts),
+    x=decade_labels,
+    y=decade_labels,
+    zmin=0, zmax=1,
+    color_continuous_scale='Viridis',
+    template='plotly_white',
+    width=700, height=650,
+    title='Bray-Curtis dissimilarity between decades'.upper(),
+)
+fig.update_layout(coloraxis_colorbar_title='DISSIMILARITY')
+fig.show()
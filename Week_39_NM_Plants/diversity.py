@@ -0,0 +1,112 @@
+import numpy as np
+import polars as pl
+from scipy import sparse
+
+#------------------------------------------------------------------------------#
+#     Species diversity indices from a sparse count tensor                     #
+#------------------------------------------------------------------------------#
+# The species x quadrat x year count tensor is stored as a 2-D sparse csr
+# matrix: one row per (quadrat, year) sample and one column per species, with
+# a samples dataframe naming the row coordinates. Most species are absent
+# from most samples, so only the observed counts are stored. Coarser views
+# (per decade, per quadrat, per quadrat and decade) are one sparse product
+# with a group indicator matrix, and every index below works on any of them,
+# one row per community.
+
+def count_tensor(lf):
+    '''
+    Return (df_samples, species, counts) from a lazy frame of plant counts
+    (see jornada.scan_plants). df_samples has quadrat, YEAR and DECADE for
+    each row of the csr matrix counts, species is the list of species codes
+    of its columns.
+    '''
+    df = (
+        lf
+        .group_by('quadrat', 'YEAR', 'DECADE', 'species_code')
+        .agg(pl.col('count').sum())
+        .with_columns(
+            SAMPLE_ID = pl.struct('quadrat', 'YEAR').rank('dense').cast(pl.Int64) - 1,
+            SPECIES_ID = pl.col('species_code').rank('dense').cast(pl.Int64) - 1,
+        )
+        .collect()
+    )
+    df_samples = (
+        df.select('SAMPLE_ID', 'quadrat', 'YEAR', 'DECADE')
+        .unique('SAMPLE_ID').sort('SAMPLE_ID').drop('SAMPLE_ID')
+    )
+    species = df.select('species_code').unique().sort('species_code').to_series().to_list()
+    counts = sparse.csr_matrix(
+        (df['count'].to_numpy(), (df['SAMPLE_ID'].to_numpy(), df['SPECIES_ID'].to_numpy())),
+        shape=(len(df_samples), len(species)),
+    )
+    return df_samples, species, counts
+
+
+def aggregate(df_samples, counts, by):
+    '''
+    Sum sample rows into one row per group of the columns in list by. Returns
+    (df_groups, group_counts), group_counts is a sparse (groups x species) matrix.
+    '''
+    group_id = (
+        df_samples.select(pl.struct(by).rank('dense').cast(pl.Int64) - 1)
+        .to_series().to_numpy()
+    )
+    df_groups = (
+        df_samples.select(by).with_columns(GROUP_ID = group_id)
+        .unique('GROUP_ID').sort('GROUP_ID').drop('GROUP_ID')
+    )
+    group_matrix = sparse.csr_matrix(
+        (np.ones(len(group_id)), (group_id, np.arange(len(group_id)))),
+        shape=(len(df_groups), len(group_id)),
+    )
+    return df_groups, (group_matrix @ counts).tocsr()
+
+
+def _proportions(counts):
+    '''  csr matrix of each count divided by its row total '''
+    totals = np.asarray(counts.sum(axis=1)).ravel().astype(float)
+    totals[totals == 0] = 1
+    return sparse.diags(1 / totals) @ counts.astype(float)
+
+
+def richness(counts):
+    '''  number of species present in each row '''
+    return counts.getnnz(axis=1)
+
+
+def shannon(counts):
+    '''  Shannon entropy H = -sum p ln p of each row, natural log '''
+    p = _proportions(counts).tocsr()
+    p.data = -p.data * np.log(p.data)
+    return np.asarray(p.sum(axis=1)).ravel()
+
+
+def simpson(counts):
+    '''  Gini-Simpson index 1 - sum p**2 of each row '''
+    p = _proportions(counts)
+    return 1 - np.asarray(p.multiply(p).sum(axis=1)).ravel()
+
+
+def bray_curtis(counts, block_size=64):
+    '''
+    Matrix of Bray-Curtis dissimilarity 1 - 2 sum min(x, y) / (sum x + sum y)
+    between all pairs of rows. The shared counts sum min(x, y) are computed
+    for blocks of rows against all rows with numpy broadcasting.
+    '''
+    x = counts.toarray().astype(float)
+    totals = x.sum(axis=1)
+    shared = np.empty((len(x), len(x)))
+    for start in range(0, len(x), block_size):
+        block = x[start:start + block_size]
+        shared[start:start + block_size] = np.minimum(block[:, None, :], x[None, :, :]).sum(axis=2)
+    with np.errstate(invalid='ignore'):
+        return 1 - 2 * shared / (totals[:, None] + totals[None, :])
+
+
+def diversity_frame(df_groups, counts):
+    '''  df_groups with RICHNESS, SHANNON and SIMPSON for each row of counts '''
+    return df_groups.with_columns(
+        RICHNESS = pl.Series(richness(counts)),
+        SHANNON = pl.Series(shannon(counts)),
+        SIMPSON = pl.Series(simpson(counts)),
+    )
@@ -0,0 +1,64 @@
+import polars as pl
+
+#------------------------------------------------------------------------------#
+#     Jornada quadrat plant counts, lazily joined with the species list        #
+#------------------------------------------------------------------------------#
+# The annual counts (one row per quadrat, year, month and species) are joined
+# to the species list inside one lazy query, so both csv files are scanned
+# only for the columns a query uses and nothing is collected before the join.
+# DECADE is an integer bucket (1910, 1920, ...) and genus is an Enum whose
+# categories are the sorted genera of the species list, so group_by keys are
+# small integers instead of strings.
+
+SPECIES_CSV = './Data_Set/Jornada_quadrat_species_list.csv'
+COUNTS_CSV = './Data_Set/Jornada_quadrat_annual_plant_counts.csv'
+
+
+def genus_enum(species_csv=SPECIES_CSV):
+    '''  Enum of all genera in the species list, sorted '''
+    return pl.Enum(
+        pl.scan_csv(species_csv)
+        .select(pl.col('genus').drop_nulls().unique().sort())
+        .collect()
+        .to_series()
+    )
+
+
+def scan_plants(species_csv=SPECIES_CSV, counts_csv=COUNTS_CSV):
+    '''
+    Return lazy frame of plant counts joined with the species list, with
+    integer YEAR and DECADE (UInt16) and genus as Enum.
+    '''
+    lf_species = (
+        pl.scan_csv(species_csv)
+        .with_columns(pl.col('genus').cast(genus_enum(species_csv)))
+    )
+    return (
+        pl.scan_csv(counts_csv, schema_overrides={'count': pl.UInt32})
+        .join(lf_species, on='species_code', how='left')
+        .with_columns(
+            YEAR = pl.col('year').cast(pl.UInt16),
+            DECADE = (pl.col('year') // 10 * 10).cast(pl.UInt16),
+        )
+    )
+
+
+def quadrat_decade_abundance(lf):
+    '''
+    Return species abundance per quadrat and decade: summed COUNT and the
+    number of years the quadrat was counted in that decade (YEARS_COUNTED),
+    so decades with fewer counts can be compared per year.
+    '''
+    return (
+        lf
+        .with_columns(
+            YEARS_COUNTED = pl.col('YEAR').n_unique().over('quadrat', 'DECADE')
+        )
+        .group_by('quadrat', 'DECADE', 'genus', 'species_code')
+        .agg(
+            COUNT = pl.col('count').sum(),
+            YEARS_COUNTED = pl.col('YEARS_COUNTED').first(),
+        )
+        .sort('quadrat', 'DECADE', 'genus', 'species_code')
+        .collect(engine='streaming')
+    )
@@ -1,22 +1,15 @@
 import polars as pl
 import plotly.express as px
-import pycountry
 pl.show_versions()
 
 #------------------------------------------------------------------------------#
-#  MAP COUNTRY ABBREVIATIONS TO FULL NAMES, USING PYCOUNTRY LIBRARY            #
+#  MAP COUNTRY ABBREVIATIONS TO FULL NAMES, USING PYCOUNTRY REFERENCE TABLE    #
 #------------------------------------------------------------------------------#
+# table is built from pycountry by ../Shared_Reference_Data/make_countries_parquet.py
 df_countries = (
-    pl.DataFrame(
-        dict(
-            zip(
-                [c.name for c in pycountry.countries],
-                [c.alpha_3 for c in pycountry.countries]
-            )
-        )
-    )
-    .transpose(include_header=True)
-    .rename({'column': 'COUNTRY', 'column_0': 'CTRY_ABBR'})
+    pl.scan_parquet('../Shared_Reference_Data/countries.parquet')
+    .select(COUNTRY = pl.col('NAME'), CTRY_ABBR = pl.col('ALPHA_3'))
+    .collect()
 )
 
 #------------------------------------------------------------------------------#
@@ -1,9 +1,14 @@
+import os
+import numpy as np
 import plotly.express as px
+import plotly.graph_objects as go
 import polars as pl
+from plotly.subplots import make_subplots
 
 # constants
-SOURCE_LOCAL = True # if True, data from csv, if False data from get git-repo
+PRECOMPUTED = True  # if True, violins drawn from server side KDE, if False px.violin
 csv_local = 'week_46_data.csv'
+cache_file = './cache/week_46_wine.parquet'
 
 csv_git_source = 'https://raw.githubusercontent.com/plotly/Figure-Friday/refs/'
 csv_git_source += 'heads/main/2024/week-46/PDO_wine_data_IT_FR.csv'
@@ -15,57 +20,187 @@ wine_colors = {
     }
 
 #------------------------------------------------------------------------------#
-#     initialize dataframe df_source from local file or git repo
+#     functions                                                                #
 #------------------------------------------------------------------------------#
-if SOURCE_LOCAL:   # read cleand-up data from local directory
-    df = pl.read_csv(csv_local)       
-else:             # read source data from git_repo, and clean-up
-    df = (
+def clean_git_source():
+    '''  read source data from git repo, and clean-up '''
+    return (
         pl.read_csv(csv_git_source)
         .with_columns(
             pl.col('Max_yield_hl')
-                .cast(pl.UInt16, strict=False),  # False changes na to null         
+                .cast(pl.UInt16, strict=False),  # False changes na to null
             pl.col('Country')
                 .str.replace('FR', 'France')
                 .str.replace('IT', 'Italy')
         )
+        .rename({'Country': 'COUNTRY'})
         .drop_nulls(subset='Max_yield_hl')
         .select(pl.all().exclude('PDOid', 'Info'))
-        .with_columns(
-            COLOR_RGB = pl.when(pl.col('COLOR') == 'Rosé')
-                           .then(pl.lit('#FF0080'))
+    )
+
+def load_wine():
+    '''
+    Return cleaned wine data from the parquet cache. The cache is built from
+    the local csv (or the cleaned git source if there is no local csv), and
+    rebuilt when the local csv is newer.
+    '''
+    if os.path.exists(cache_file) and (
+        not os.path.exists(csv_local) or
+        os.path.getmtime(cache_file) >= os.path.getmtime(csv_local)
+    ):
+        return pl.read_parquet(cache_file)
+    if os.path.exists(csv_local):
+        df = pl.read_csv(csv_local)
+    else:
+        df = clean_git_source()
+        df.write_csv(csv_local)
+    df = df.with_columns(
+        pl.col('COUNTRY').cast(pl.Enum(df['COUNTRY'].unique(maintain_order=True))),
+        pl.col('Color').cast(pl.Enum(df['Color'].unique(maintain_order=True))),
+        pl.col('Max_yield_hl').cast(pl.UInt16),
+    )
+    os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+    df.write_parquet(cache_file)
+    return df
+
+def violin_stats(df, group_cols, value, n_points=100):
+    '''
+    Gaussian kernel density and box plot statistics of column value for each
+    group of group_cols, computed with numpy. Bandwidth is Silverman's rule
+    and the curve spans 2 bandwidths past the data, as plotly.js violins do.
+    The kernel sums run over distinct values weighted by their counts, so cost
+    grows with distinct values, not rows. Returns (df_kde, df_box): long
+    dataframe of Y and DENSITY per group, and one row of stats per group.
+    '''
+    df_groups = (
+        df
+        .group_by(group_cols, maintain_order=True)
+        .agg(pl.col(value).cast(pl.Float64))
+    )
+    kde_rows, box_rows = [], []
+    for row in df_groups.iter_rows(named=True):
+        keys = {col: row[col] for col in group_cols}
+        x = np.asarray(row[value])
+        q1, median, q3 = np.percentile(x, [25, 50, 75])
+        iqr = q3 - q1
+        bandwidth = 1.059 * min(x.std(ddof=1), iqr / 1.349) * len(x) ** -0.2
+        bandwidth = bandwidth if bandwidth > 0 else 1.0   # 1 row, or no spread
+        distinct, counts = np.unique(x, return_counts=True)
+        y = np.linspace(x.min() - 2 * bandwidth, x.max() + 2 * bandwidth, n_points)
+        z = (y[:, None] - distinct[None, :]) / bandwidth
+        density = (
+            (np.exp(-0.5 * z ** 2) * counts).sum(axis=1) /
+            (len(x) * bandwidth * np.sqrt(2 * np.pi))
         )
+        kde_rows.append({**keys, 'Y': y.tolist(), 'DENSITY': density.tolist()})
+        box_rows.append({
+            **keys,
+            'N': len(x),
+            'Q1': q1, 'MEDIAN': median, 'Q3': q3,
+            'LOWER_FENCE': x[x >= q1 - 1.5 * iqr].min(),
+            'UPPER_FENCE': x[x <= q3 + 1.5 * iqr].max(),
+        })
+    df_kde = (
+        pl.DataFrame(kde_rows)
+        .with_columns(pl.col(c).cast(df.schema[c]) for c in group_cols)
+        .explode('Y', 'DENSITY')
+    )
+    df_box = (
+        pl.DataFrame(box_rows)
+        .with_columns(pl.col(c).cast(df.schema[c]) for c in group_cols)
     )
-    df.write_csv(csv_local)
-    df.head()
+    return df_kde, df_box
 
-fig = px.violin(
-    df,
-    x='Color',
-    y='Max_yield_hl',
-    facet_col='COUNTRY',
-    title = (
-        'Maximum permitted wine yield (hectoliters per hectare) in France and Italy'
-        '<a href="https://en.wikipedia.org/wiki/Yield_(wine)" ' + 
-        'style="color:yellow;"> Wikipedia LINK</a>'
-    ),
-    color='Color', 
-    color_discrete_map=wine_colors,
-    template='plotly_dark',
+#------------------------------------------------------------------------------#
+#     initialize dataframe df from the parquet cache
+#------------------------------------------------------------------------------#
+df = load_wine()
+
+title = (
+    'Maximum permitted wine yield (hectoliters per hectare) in France and Italy'
+    '<a href="https://en.wikipedia.org/wiki/Yield_(wine)" ' +
+    'style="color:yellow;"> Wikipedia LINK</a>'
 )
 
+if PRECOMPUTED:
+    #--------------------------------------------------------------------------#
+    #   one filled outline and one precomputed box per country and color, the #
+    #   figure holds ~100 points per violin no matter how many wines there are #
+    #--------------------------------------------------------------------------#
+    df_kde, df_box = violin_stats(df, ['COUNTRY', 'Color'], 'Max_yield_hl')
+    countries = df_box['COUNTRY'].unique(maintain_order=True).to_list()
+    colors = df_box['Color'].unique(maintain_order=True).to_list()
+    half_width = 0.45 / df_kde['DENSITY'].max()  # widest violin fills its slot
+    fig = make_subplots(
+        rows=1, cols=len(countries),
+        shared_yaxes=True,
+        subplot_titles=countries,
+        horizontal_spacing=0.03,
+    )
+    for (country, color), df_group in df_kde.partition_by(
+            'COUNTRY', 'Color', as_dict=True, maintain_order=True).items():
+        col = countries.index(country) + 1
+        x0 = colors.index(color)
+        box = df_box.filter(
+            (pl.col('COUNTRY') == country) & (pl.col('Color') == color)
+        ).row(0, named=True)
+        y = df_group['Y'].to_numpy()
+        width = half_width * df_group['DENSITY'].to_numpy()
+        fig.add_trace(
+            go.Scatter(
+                x=np.concatenate([x0 - width, (x0 + width)[::-1]]),
+                y=np.concatenate([y, y[::-1]]),
+                fill='toself',
+                fillcolor=wine_colors[color],
+                line=dict(color=wine_colors[color], width=1),
+                opacity=0.6,
+                hoverinfo='skip',
+                mode='lines',
+            ),
+            row=1, col=col,
+        )
+        fig.add_trace(
+            go.Box(
+                x=[x0],
+                q1=[box['Q1']], median=[box['MEDIAN']], q3=[box['Q3']],
+                lowerfence=[box['LOWER_FENCE']], upperfence=[box['UPPER_FENCE']],
+                width=0.08,
+                fillcolor=wine_colors[color],
+                line=dict(color='white', width=1),
+                name=f'{color} (n={box["N"]:,})',
+            ),
+            row=1, col=col,
+        )
+    fig.update_xaxes(
+        tickmode='array',
+        tickvals=list(range(len(colors))),
+        ticktext=colors,
+        range=[-0.6, len(colors) - 0.4],
+    )
+    fig.update_layout(title=title, template='plotly_dark')
+else:
+    fig = px.violin(
+        df,
+        x='Color',
+        y='Max_yield_hl',
+        facet_col='COUNTRY',
+        title = title,
+        color='Color',
+        color_discrete_map=wine_colors,
+        template='plotly_dark',
+    )
+    # next line changes facet labels from COUNTRY=xyz, to just show xyz
+    fig.for_each_annotation(lambda a: a.update(text=a.text.replace("COUNTRY=", "")))
+
 fig.update_layout(
-    font=dict(size=16), 
+    font=dict(size=16),
     showlegend=False,
     # xaxis_title=dict(text='Date', font=dict(size=16, color='#FFFFFF')),
     yaxis_title=dict(text=''),
 )
 
-# next line changes facet labels from COUNTRY=xyz, to just show xyz
-fig.for_each_annotation(lambda a: a.update(text=a.text.replace("COUNTRY=", "")))
-
 # # this syntax is specific to the faceted plot
 fig.update_xaxes(title='')
 
 fig.show()
-fig.write_html('Wines.html')
\ No newline at end of file
+fig.write_html('Wines.html')
@@ -0,0 +1,120 @@
+import os
+import polars as pl
+import polars.selectors as cs
+
+#------------------------------------------------------------------------------#
+#     World Bank WDI indicator csv files in long format                        #
+#------------------------------------------------------------------------------#
+# Every WDI download (API_<indicator code>_DS2_en_csv_v2_<n>.csv) has the same
+# layout: one row per country or aggregate, 4 id columns (Country Name,
+# Country Code, Indicator Name, Indicator Code) and one column per year. The
+# functions here unpivot the year columns once, so per-country calculations
+# are window expressions over Country Code instead of loops over columns.
+#
+# Each download comes with Metadata_Country_<csv name>, which gives Region and
+# IncomeGroup for countries and leaves Region empty for aggregates such as
+# World, High income or Arab World. load_indicators joins it, marks the
+# aggregates with IS_AGGREGATE and caches the typed long table as parquet in
+# ./cache (rebuilt when the csv is newer), so dashboards combining several
+# indicators read parquet instead of parsing wide csv files. Pass COUNTRIES or
+# AGGREGATES (or any other polars expression) as predicate to filter rows.
+
+ID_COLS = ['Country Name', 'Country Code', 'Indicator Name', 'Indicator Code']
+CACHE_DIR = './cache'
+
+COUNTRIES = pl.col('IS_AGGREGATE').not_()
+AGGREGATES = pl.col('IS_AGGREGATE')
+
+
+def scan_wdi(csv_path):
+    '''
+    Return lazy frame of a WDI indicator csv in long format, one row per
+    country and year, with columns YEAR (UInt16) and VALUE (Float64).
+    '''
+    return (
+        pl.scan_csv(csv_path, infer_schema=False)
+        .unpivot(
+            index=ID_COLS,
+            on=cs.matches(r'^\d{4}$'),     # skips the empty column some files end with
+            variable_name='YEAR',
+            value_name='VALUE',
+        )
+        .with_columns(
+            pl.col('YEAR').cast(pl.UInt16),
+            pl.col('VALUE').cast(pl.Float64),
+        )
+    )
+
+
+def yoy_changes(lf, min_jump=None, from_year=None):
+    '''
+    Add CHANGE, the difference of VALUE from the previous year, per country.
+    With min_jump, keep only countries with a CHANGE of at least min_jump in
+    some year. With from_year, drop earlier years before differencing.
+    '''
+    if from_year is not None:
+        lf = lf.filter(pl.col('YEAR') >= from_year)
+    lf = (
+        lf
+        .sort('Country Code', 'YEAR')
+        .with_columns(CHANGE = pl.col('VALUE').diff().over('Country Code'))
+    )
+    if min_jump is not None:
+        lf = lf.filter(pl.col('CHANGE').max().over('Country Code') >= min_jump)
+    return lf
+
+
+def _metadata_path(csv_path):
+    folder, name = os.path.split(csv_path)
+    return os.path.join(folder, 'Metadata_Country_' + name)
+
+
+def _build_indicator(csv_path):
+    df_meta = (
+        pl.scan_csv(_metadata_path(csv_path), infer_schema=False)
+        .select('Country Code', 'Region', 'IncomeGroup')
+    )
+    return (
+        scan_wdi(csv_path)
+        .join(df_meta, on='Country Code', how='left')
+        .select(
+            pl.col('Country Name', 'Country Code'),
+            pl.col('Indicator Name', 'Indicator Code', 'Region', 'IncomeGroup')
+                .cast(pl.Categorical),
+            IS_AGGREGATE = pl.col('Region').is_null(),
+            YEAR = pl.col('YEAR'),
+            VALUE = pl.col('VALUE'),
+        )
+        .sort('Country Code', 'YEAR')
+        .collect()
+    )
+
+
+def scan_indicator(csv_path, cache_dir=CACHE_DIR):
+    '''
+    Return lazy frame of one WDI indicator in long format joined with its
+    country metadata, read from the parquet cache unless the csv is newer.
+    '''
+    cache_file = os.path.join(
+        cache_dir, os.path.splitext(os.path.basename(csv_path))[0] + '.parquet'
+    )
+    if (
+        not os.path.exists(cache_file) or
+        os.path.getmtime(cache_file) < os.path.getmtime(csv_path)
+    ):
+        os.makedirs(cache_dir, exist_ok=True)
+        _build_indicator(csv_path).write_parquet(cache_file)
+    return pl.scan_parquet(cache_file)
+
+
+def load_indicators(*csv_paths, predicate=None, cache_dir=CACHE_DIR):
+    '''
+    Return long dataframe of one or more WDI indicators with columns Country
+    Name, Country Code, Indicator Name, Indicator Code, Region, IncomeGroup,
+    IS_AGGREGATE, YEAR and VALUE. predicate, e.g. COUNTRIES, filters rows
+    before they are read from the parquet cache.
+    '''
+    lf = pl.concat([scan_indicator(path, cache_dir) for path in csv_paths])
+    if predicate is not None:
+        lf = lf.filter(predicate)
+    return lf.collect()
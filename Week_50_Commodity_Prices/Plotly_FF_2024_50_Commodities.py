@@ -1,69 +1,16 @@
 import plotly.express as px
 import polars as pl
+from commodity_store import load_prices
+from commodity_stats import correlation_frame, rolling_stats
 
 #-------------------------------------------------------------------------------
-#    Read excel speadsheet to polars dataframe, df_source.
+#    Read coffee and tea prices from the commodity store (long format parquet,
+#    built from the World Bank excel file on first use), one column per series
 #-------------------------------------------------------------------------------
-df_source = list_col_names = (
-    pl.read_excel(
-        'CMO-Historical-Data-Monthly.xlsx',
-        sheet_name='Monthly Prices',
-        has_header=True,
-        read_options={'header_row': 4}
-    )
-    .rename({'__UNNAMED__0': 'MONTH'})
-)
-#-------------------------------------------------------------------------------
-#    Make a list of useful columns names using rows 7 & 6
-#-------------------------------------------------------------------------------
-df_header_info = (
-    df_source   
-    .head(2)
-    .transpose(include_header=True)
-    .rename({
-        'column'         : 'DESC',
-        'column_0'       : 'UNITS',
-        'column_1'       : 'ITEM',
-        })
-    .with_columns(
-         column_names = # if units column is blank, just take name without units
-             pl.when(pl.col('ITEM').is_not_null())
-               .then(pl.col('ITEM') + pl.lit(' ') + pl.col('UNITS'))
-               .otherwise(pl.col('DESC'))
-    )
-)
-list_column_names = (
-    df_header_info
-    .select(pl.col('column_names'))
-    .to_series().to_list()
-)
-
-#-------------------------------------------------------------------------------
-#    Make a working dataframe, convert data columns from  strings to floats
-#-------------------------------------------------------------------------------
-                                                                               
-data_cols = df_source.columns[1:]  # includes all columns after the first
-print()
-df = (
-    df_source
-    .with_row_index()
-    .filter(pl.col('index') > 1)
-    .drop('index')
-    .with_columns(pl.col(data_cols).cast(pl.Float64, strict=False))
-    .with_columns(YEAR_STR = pl.col('MONTH').str.slice(0,4))
-    .with_columns(MONTH_STR = pl.col('MONTH').str.slice(-2,2))
-    .with_columns(DATE_STR = (pl.col('YEAR_STR') + '-' + pl.col('MONTH_STR')))
-    .with_columns(DATE = pl.col('DATE_STR').str.to_date('%Y-%m'))
-    .drop(['YEAR_STR', 'MONTH_STR', 'DATE_STR'])  # temporary cols to make DATE
-
-)
-# rename all columns, and add newly added DATE column to this list
-df.columns=list_column_names + ['DATE']
-# reorder the columns, with DATE at the far left, followed by data columns
 df = (
-    df
-    .select(['DATE'] + list_column_names)
-    .drop('MONTH')
+    load_prices('COFFEE_ARABIC', 'COFFEE_ROBUS', 'TEA_AVG')
+    .pivot(on='COMMODITY', index='DATE', values='PRICE')
+    .sort('DATE')
 )
 
 #-------------------------------------------------------------------------------
@@ -74,9 +21,10 @@ df_plotting = (   # add average coffee price
     df
     .with_columns(
         (   # calculate average coffee prices, AVG_TEA included in dataset
-            (pl.col('COFFEE_ARABIC ($/kg)') + 
-             pl.col('COFFEE_ROBUS ($/kg)'))
-            /2.0).alias('COFFEE_AVG ($/kg)')
+            (pl.col('COFFEE_ARABIC') + 
+             pl.col('COFFEE_ROBUS'))
+            /2.0).alias('COFFEE_AVG ($/kg)'),
+        pl.col('TEA_AVG').alias('TEA_AVG ($/kg)'),
         )
     .with_columns(pl.col(data_cols).round(2))
 )
@@ -131,4 +79,41 @@ fig.update_layout(
     )
 fig.update_layout(hovermode='x unified')
 fig.write_html('Plotly_FF_2024_50_Coffee_Tea.html')
-fig.show()
\ No newline at end of file
+fig.show()
+
+#-------------------------------------------------------------------------------
+#    Correlation heatmap of monthly log returns, all commodities, latest 5 years
+#-------------------------------------------------------------------------------
+window = 60     # months
+stats = rolling_stats(window)
+end_date = stats['dates'][-1]
+df_corr = (
+    correlation_frame(stats, end_date)
+    .pivot(on='COMMODITY_B', index='COMMODITY_A', values='CORR')
+)
+fig = px.imshow(
+    df_corr.drop('COMMODITY_A').to_numpy(),
+    x=df_corr.columns[1:],
+    y=df_corr['COMMODITY_A'].to_list(),
+    color_continuous_scale='RdBu_r',
+    zmin=-1, zmax=1,
+    template='simple_white',
+    height=900, width=900,
+)
+fig.update_traces(
+    hovertemplate="<br>".join([
+        '%{y} vs %{x}',
+        'correlation: %{z:.2f}',
+        '<extra></extra>'
+    ])
+)
+fig.update_layout(
+    title_text = (
+        'COMMODITY PRICE CORRELATIONS<br>' +
+        f'<sup>Monthly log returns, {window} months ending {end_date}. ' +
+        'Blank where a series has gaps</sup>'
+    ),
+    xaxis=dict(tickfont_size=8), yaxis=dict(tickfont_size=8),
+)
+fig.write_html('Plotly_FF_2024_50_Correlations.html')
+fig.show()
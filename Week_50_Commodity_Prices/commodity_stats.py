@@ -0,0 +1,116 @@
+import os
+from datetime import date
+import numpy as np
+import polars as pl
+from numpy.lib.stride_tricks import sliding_window_view
+from commodity_store import scan_prices, store_file
+
+#------------------------------------------------------------------------------#
+#     Rolling statistics over all commodity series at once                     #
+#------------------------------------------------------------------------------#
+# The long price store is pivoted once to a dense float array with one row per
+# month and one column per commodity (NaN where no price was published). Monthly
+# log returns of all commodities are cut into rolling windows with a strided
+# view, which has shape (windows, commodities, window) and copies no data, so
+# volatility and the full correlation matrix of every window are each a single
+# vectorized numpy expression.
+#
+# A window statistic is NaN for a commodity unless it has a price for every
+# month of that window. Results are cached per window size in ./cache as npz
+# files and rebuilt when the price store is newer.
+
+CACHE_DIR = './cache'
+MONTHS_PER_YEAR = 12
+
+
+def price_matrix():
+    '''
+    Return (dates, codes, prices): numpy arrays of month start dates, commodity
+    codes and the dense float array of prices, shape (months, commodities).
+    '''
+    df_wide = (
+        scan_prices()
+        .select('DATE', 'COMMODITY', 'PRICE')
+        .collect()
+        .pivot(on='COMMODITY', index='DATE', values='PRICE')
+        .sort('DATE')
+    )
+    codes = np.array(df_wide.columns[1:])
+    return (
+        df_wide['DATE'].to_numpy(),
+        codes,
+        df_wide.select(codes.tolist()).to_numpy().astype(np.float64),
+    )
+
+
+def log_returns(prices):
+    '''  monthly log returns, one row shorter than prices '''
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.diff(np.log(np.where(prices > 0, prices, np.nan)), axis=0)
+
+
+def rolling_volatility(returns, window):
+    '''
+    Annualized standard deviation of log returns over each rolling window,
+    shape (months - window + 1, commodities).
+    '''
+    windows = sliding_window_view(returns, window, axis=0)   # (t, commodity, window)
+    return windows.std(axis=2, ddof=1) * np.sqrt(MONTHS_PER_YEAR)
+
+
+def rolling_correlation(returns, window):
+    '''
+    Correlation matrix of log returns for each rolling window, shape
+    (months - window + 1, commodities, commodities).
+    '''
+    windows = sliding_window_view(returns, window, axis=0)   # (t, commodity, window)
+    centered = windows - windows.mean(axis=2, keepdims=True)
+    norms = np.sqrt(np.einsum('tcw,tcw->tc', centered, centered))
+    covariance = np.einsum('tiw,tjw->tij', centered, centered)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return covariance / (norms[:, :, None] * norms[:, None, :])
+
+
+def rebased_index(dates, prices, base_date=date(2010, 1, 1)):
+    '''  prices divided by the price at base_date, times 100 '''
+    base_row = np.flatnonzero(dates == np.datetime64(base_date, 'D'))[0]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return 100 * prices / prices[base_row]
+
+
+def rolling_stats(window=60, cache_dir=CACHE_DIR):
+    '''
+    Return dict with codes, the end date of each window (dates), volatility
+    and correlation for rolling windows of window months of returns. Read from
+    the npz cache for this window size unless the price store is newer.
+    '''
+    cache_file = os.path.join(cache_dir, f'commodity_stats_w{window}.npz')
+    if (
+        os.path.exists(cache_file) and
+        os.path.getmtime(cache_file) >= os.path.getmtime(store_file())
+    ):
+        with np.load(cache_file) as npz:
+            return dict(npz)
+
+    dates, codes, prices = price_matrix()
+    returns = log_returns(prices)
+    stats = {
+        'codes': codes,
+        'dates': dates[window:],    # return of row i ends at month i + 1
+        'volatility': rolling_volatility(returns, window),
+        'correlation': rolling_correlation(returns, window).astype(np.float32),
+    }
+    os.makedirs(cache_dir, exist_ok=True)
+    np.savez(cache_file, **stats)
+    return stats
+
+
+def correlation_frame(stats, end_date):
+    '''  long dataframe of the correlation matrix for the window ending at end_date '''
+    i = np.flatnonzero(stats['dates'] == np.datetime64(end_date, 'D'))[0]
+    codes = stats['codes'].tolist()
+    return pl.DataFrame({
+        'COMMODITY_A': np.repeat(codes, len(codes)),
+        'COMMODITY_B': np.tile(codes, len(codes)),
+        'CORR': stats['correlation'][i].ravel(),
+    })
@@ -0,0 +1,103 @@
+import os
+import polars as pl
+
+#------------------------------------------------------------------------------#
+#     Long format store of World Bank monthly commodity prices                 #
+#------------------------------------------------------------------------------#
+# The Monthly Prices sheet of CMO-Historical-Data-Monthly.xlsx is wide: one
+# column per commodity, with the description in the header row and the units
+# and commodity code in the two rows below it. Reading the sheet, rebuilding
+# the column names and casting ~70 text columns is the slowest step of every
+# chart, so it is done once here and saved as a long parquet file with columns
+# DATE, COMMODITY, DESCRIPTION, UNIT and PRICE.
+#
+# Rows are sorted by COMMODITY then DATE, and every commodity has a row for
+# every month (PRICE is null where the sheet shows '…'), so each parquet row
+# group holds exactly one commodity. Filtering on COMMODITY in a lazy scan
+# reads only the row groups of the requested series. The parquet file is
+# rebuilt when the Excel file is newer.
+
+XLSX_FILE = 'CMO-Historical-Data-Monthly.xlsx'
+CACHE_FILE = './cache/cmo_monthly_prices.parquet'
+
+
+def _build_store(xlsx_path):
+    df_sheet = (
+        pl.read_excel(
+            xlsx_path,
+            sheet_name='Monthly Prices',
+            has_header=True,
+            read_options={'header_row': 4}
+        )
+        .rename({'__UNNAMED__0': 'MONTH'})
+    )
+    # header row is the description, next 2 rows are units and commodity code
+    df_header = (
+        df_sheet
+        .head(2)
+        .drop('MONTH')
+        .transpose(include_header=True, header_name='DESCRIPTION', column_names=['UNIT', 'COMMODITY'])
+        .with_columns(
+            DESCRIPTION = pl.col('DESCRIPTION').str.strip_chars(' *'),  # drop footnote marks
+            UNIT = pl.col('UNIT').str.strip_chars('()'),
+            COMMODITY = pl.col('COMMODITY').str.to_uppercase(),   # Tin and Zinc are not
+        )
+    )
+    commodity_names = dict(zip(df_sheet.columns[1:], df_header['COMMODITY']))
+    n_months = df_sheet.height - 2
+
+    df = (
+        df_sheet
+        .slice(2)
+        .rename(commodity_names)
+        .unpivot(index='MONTH', variable_name='COMMODITY', value_name='PRICE')
+        .join(df_header, on='COMMODITY', how='left')
+        .select(
+            DATE = pl.col('MONTH').str.to_date('%YM%m'),
+            COMMODITY = pl.col('COMMODITY'),
+            DESCRIPTION = pl.col('DESCRIPTION'),
+            UNIT = pl.col('UNIT'),
+            PRICE = pl.col('PRICE').cast(pl.Float64, strict=False),  # '…' to null
+        )
+        .sort('COMMODITY', 'DATE')
+    )
+    return df, n_months
+
+
+def store_file(xlsx_path=XLSX_FILE, cache_file=CACHE_FILE):
+    '''  return path of the parquet store, building it if missing or stale '''
+    if (
+        not os.path.exists(cache_file) or
+        os.path.getmtime(cache_file) < os.path.getmtime(xlsx_path)
+    ):
+        df, n_months = _build_store(xlsx_path)
+        os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+        df.write_parquet(cache_file, row_group_size=n_months)  # 1 group per commodity
+    return cache_file
+
+
+def scan_prices(xlsx_path=XLSX_FILE, cache_file=CACHE_FILE):
+    '''  lazy frame of the whole long format price store '''
+    return pl.scan_parquet(store_file(xlsx_path, cache_file))
+
+
+def commodities(xlsx_path=XLSX_FILE, cache_file=CACHE_FILE):
+    '''  dataframe of COMMODITY codes with their DESCRIPTION and UNIT '''
+    return (
+        scan_prices(xlsx_path, cache_file)
+        .select('COMMODITY', 'DESCRIPTION', 'UNIT')
+        .unique(maintain_order=True)
+        .collect()
+    )
+
+
+def load_prices(*commodity_codes, xlsx_path=XLSX_FILE, cache_file=CACHE_FILE):
+    '''
+    Return long dataframe of monthly prices for the given commodity codes
+    (e.g. 'COFFEE_ARABIC', 'TEA_AVG'), all commodities if none are given.
+    Only the parquet row groups of the requested commodities are read.
+    '''
+    lf = scan_prices(xlsx_path, cache_file)
+    if commodity_codes:
+        lf = lf.filter(pl.col('COMMODITY').is_in(list(commodity_codes)))
+    return lf.collect()
@@ -1,57 +1,27 @@
 import plotly.express as px
 import polars as pl
+from ors import percentile_profiles, scan_ors
 #-------------------------------------------------------------------------------
-#    Read csv data to polars dataframe, clean the data.  
+#    Read csv data with the ors module, keep complete percentile profiles of
+#    prior work experience (estimates are days, converted to years)
 #-------------------------------------------------------------------------------
 df_source = (
-    pl.read_csv(
-        'ors-limited-dataset.csv',
-    )
-    .filter(pl.col('CATEGORY') == 'Prior work experience')
-    .filter(pl.col('ESTIMATE TEXT').str.contains('percentile'))
-    # .filter(pl.col('OCCUPATION') != 'All workers')
+    percentile_profiles(scan_ors(), categories=['Prior work experience'])
     .with_columns(
         OCCUPATION = 
         pl.when(pl.col('OCCUPATION').str.starts_with('Executive secretaries'))
           .then(pl.lit('Exec Admin')).otherwise('OCCUPATION')
     )
-    .with_columns(pl.col('ESTIMATE').cast(pl.Float32).cast(pl.Int16))
-    .with_columns(MED_YEARS_EXP = pl.col('ESTIMATE')/365)
-    .with_columns(PERCENTILE =  pl.lit(0))  # initialize all values to zero
-    .with_columns(
-        PERCENTILE = 
-            pl.when(pl.col('ESTIMATE TEXT').str.contains('10'))
-                .then(pl.lit(10))
-                .when(pl.col('ESTIMATE TEXT').str.contains('25'))
-                .then(pl.lit(25))
-                .when(pl.col('ESTIMATE TEXT').str.contains('50'))
-                .then(pl.lit(50))
-                .when(pl.col('ESTIMATE TEXT').str.contains('75'))
-                .then(pl.lit(75))
-                .when(pl.col('ESTIMATE TEXT').str.contains('90'))
-                .then(pl.lit(90))                                                
-    )
-    .pivot(
-        on = 'OCCUPATION',
-        index='PERCENTILE',
-        values= 'MED_YEARS_EXP'
-    )
-    .sort('PERCENTILE')
+    .with_columns(MED_YEARS_EXP = pl.col('ESTIMATE').cast(pl.Int16)/365)
+    .sort('OCCUPATION', 'PERCENTILE')
+    .collect()
 )
 
-#-------------------------------------------------------------------------------
-#    Find columns that have data for all 5 percentiles, use for scatter plot
-#-------------------------------------------------------------------------------
-cols_w_all_data = sorted(
-    [
-        c for c in df_source.columns 
-        if (len(df_source[c].drop_nulls()) == 5) 
-    ]
-)
 fig=px.scatter(
     df_source,
     'PERCENTILE',
-    cols_w_all_data,
+    'MED_YEARS_EXP',
+    color='OCCUPATION',
     template='simple_white',
     title='Experience by Occupation'.upper(),
     width=1200, height=500
@@ -82,11 +52,14 @@ color_dict ={
 }
 plot_cols = sorted(color_dict.keys())
 plot_colors = [color_dict.get(c) for c in plot_cols]
+df_selected = df_source.filter(pl.col('OCCUPATION').is_in(plot_cols))
 
 fig=px.scatter(
-    df_source,
+    df_selected,
     'PERCENTILE',
-    plot_cols,
+    'MED_YEARS_EXP',
+    color='OCCUPATION',
+    color_discrete_map=color_dict,
     template='simple_white',
     title='Experience by Occupation'.upper(),
     width=800, height=500
@@ -107,11 +80,11 @@ fig.update_xaxes(
 #    Touch up and annotate
 #-------------------------------------------------------------------------------
 annotation_x_offset = 1
+df_last = df_selected.group_by('OCCUPATION', maintain_order=True).last()
 for i in range(4):
     fig['data'][i]['line']['color']=plot_colors[i]
-    fig['data'][i]['marker']['color']=plot_colors[i]
-    x_annotate = annotation_x_offset + df_source['PERCENTILE'].to_list()[-1]
-    y_annotate = df_source[plot_cols[i]].to_list()[-1]
+    x_annotate = annotation_x_offset + df_last['PERCENTILE'][i]
+    y_annotate = df_last['MED_YEARS_EXP'][i]
     fig.add_annotation(
         x=x_annotate, xanchor='left',
         y=y_annotate, 
@@ -0,0 +1,58 @@
+import polars as pl
+
+#------------------------------------------------------------------------------#
+#     Percentile profiles from the BLS Occupational Requirements Survey        #
+#------------------------------------------------------------------------------#
+# ORS estimates come one per row. Percentile estimates say which percentile
+# they are in the ESTIMATE TEXT, e.g. '... 25th percentile ...'. One regex
+# extract turns that text into a PERCENTILE code (10, 25, 50, 75, 90), and
+# the rest of the text, with the percentile taken out, names the MEASURE, so
+# every category of the survey is handled the same way.
+#
+# Profiles stay in long format (one row per occupation, measure and
+# percentile). Completeness is a window count over the profile keys, so the
+# query runs lazily from the csv scan and also fits the full ORS release.
+
+ORS_CSV = 'ors-limited-dataset.csv'
+PERCENTILE_PATTERN = r'(\d+)th percentile'
+PROFILE_KEYS = ['CATEGORY', 'MEASURE', 'OCCUPATION']
+
+
+def scan_ors(csv_path=ORS_CSV):
+    '''
+    Return lazy frame of the ORS csv with ESTIMATE as Float64 (suppressed or
+    text estimates are null), PERCENTILE (UInt8, null for estimates that are
+    not percentiles) and MEASURE, the estimate text without the percentile.
+    '''
+    return (
+        pl.scan_csv(csv_path, infer_schema=False)
+        .with_columns(
+            ESTIMATE = pl.col('ESTIMATE').str.replace_all(',', '').cast(pl.Float64, strict=False),
+            PERCENTILE = pl.col('ESTIMATE TEXT').str.extract(PERCENTILE_PATTERN, 1).cast(pl.UInt8),
+            MEASURE = pl.col('ESTIMATE TEXT').str.replace(PERCENTILE_PATTERN, 'percentile'),
+        )
+    )
+
+
+def percentile_profiles(lf, categories=None, complete_only=True):
+    '''
+    Return lazy long frame of percentile estimates, columns CATEGORY, MEASURE,
+    OCCUPATION, PERCENTILE and ESTIMATE, sorted. Limit to a list of categories
+    if given. With complete_only, keep only profiles that have an estimate for
+    every percentile published for their category and measure.
+    '''
+    lf = lf.filter(pl.col('PERCENTILE').is_not_null())
+    if categories is not None:
+        lf = lf.filter(pl.col('CATEGORY').is_in(list(categories)))
+    lf = (
+        lf
+        .filter(pl.col('ESTIMATE').is_not_null())
+        .group_by(PROFILE_KEYS + ['PERCENTILE'])
+        .agg(pl.col('ESTIMATE').first())
+    )
+    if complete_only:
+        lf = lf.filter(
+            pl.col('PERCENTILE').n_unique().over(PROFILE_KEYS) ==
+            pl.col('PERCENTILE').n_unique().over('CATEGORY', 'MEASURE')
+        )
+    return lf.sort(PROFILE_KEYS + ['PERCENTILE'])